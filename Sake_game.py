@@ -1,580 +1,1519 @@
-import pygame
-import random
-import math
-
-# =========================
-# CONFIG & CONSTANTS
-# =========================
-pygame.init()
-
-WIDTH, HEIGHT = 600, 400
-GRID = 20  # size of each cell
-FPS_BASE = 12  # base snake speed (frames per second)
-MAX_FPS = 30
-
-LIVES_START = 3
-LEVEL_UP_EVERY = 5  # points required per level
-
-# Power-up settings
-POWERUP_CHANCE = 0.08     # chance per food eaten to spawn a power-up
-POWERUP_DURATION = 4500   # ms duration of power effects
-POWERUP_TTL = 9000        # ms a power-up stays on the field
-
-# Special (bonus) food settings
-SPECIAL_FOOD_EVERY = 10   # seconds between spawn attempts
-SPECIAL_FOOD_TTL = 6000   # ms to live
-SPECIAL_FOOD_VALUE = 5
-
-# Obstacles
-NUM_STATIC_OBSTACLES = 6
-NUM_MOVING_OBSTACLES = 2
-
-# Colors
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-GRAY = (40, 40, 48)
-MID = (70, 72, 82)
-RED = (220, 68, 90)
-GREEN = (40, 220, 120)
-BLUE = (50, 153, 213)
-GOLD = (255, 200, 60)
-PURPLE = (160, 120, 255)
-CYAN = (80, 240, 240)
-
-# UI
-FONT = pygame.font.SysFont("bahnschrift", 22)
-FONT_BIG = pygame.font.SysFont("bahnschrift", 36)
-FONT_HUGE = pygame.font.SysFont("bahnschrift", 48)
-
-SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Snake – Deluxe")
-CLOCK = pygame.time.Clock()
-
-# Sound (optional). Leave False if you don't have files.
-SOUND_ENABLED = False
-SND_EAT = None
-SND_POWER = None
-SND_HIT = None
-if SOUND_ENABLED:
-    try:
-        SND_EAT = pygame.mixer.Sound("eat.wav")
-        SND_POWER = pygame.mixer.Sound("power.wav")
-        SND_HIT = pygame.mixer.Sound("hit.wav")
-    except Exception:
-        SOUND_ENABLED = False
-
-# =========================
-# UTILITIES
-# =========================
-
-def grid_pos(rand=True):
-    """Return a random grid-aligned position inside bounds."""
-    x = random.randrange(0, WIDTH // GRID) * GRID
-    y = random.randrange(0, HEIGHT // GRID) * GRID
-    return [x, y]
-
-
-def draw_gradient_bg():
-    """Simple vertical gradient background drawn per frame (no image file)."""
-    top = (18, 18, 24)
-    bottom = (28, 28, 40)
-    for i in range(HEIGHT):
-        t = i / HEIGHT
-        r = int(top[0] * (1 - t) + bottom[0] * t)
-        g = int(top[1] * (1 - t) + bottom[1] * t)
-        b = int(top[2] * (1 - t) + bottom[2] * t)
-        pygame.draw.line(SCREEN, (r, g, b), (0, i), (WIDTH, i))
-
-
-def draw_scoreboard(score, level, lives, high):
-    bar_h = 36
-    pygame.draw.rect(SCREEN, (22, 22, 30), (0, 0, WIDTH, bar_h))
-    pygame.draw.line(SCREEN, MID, (0, bar_h), (WIDTH, bar_h), 2)
-
-    txt = FONT.render(f"Score: {score}", True, WHITE)
-    lvl = FONT.render(f"Level: {level}", True, WHITE)
-    life = FONT.render("❤ " * lives, True, RED)
-    hi = FONT.render(f"High: {high}", True, GOLD)
-
-    SCREEN.blit(txt, (10, 8))
-    SCREEN.blit(lvl, (150, 8))
-    SCREEN.blit(hi, (WIDTH - hi.get_width() - 10, 8))
-    SCREEN.blit(life, (WIDTH // 2 - life.get_width() // 2, 6))
-
-
-def rounded_rect(surface, color, rect, radius=6):
-    pygame.draw.rect(surface, color, rect, border_radius=radius)
-
-
-# =========================
-# PARTICLES (for juice)
-# =========================
-class Particle:
-    def __init__(self, pos, vel, life, size, color):
-        self.x, self.y = pos
-        self.vx, self.vy = vel
-        self.life = life
-        self.size = size
-        self.color = color
-        self.age = 0
-
-    def update(self, dt):
-        self.x += self.vx * dt
-        self.y += self.vy * dt
-        self.age += dt * 1000
-        return self.age < self.life
-
-    def draw(self, surf):
-        alpha = max(0, 255 - int((self.age / self.life) * 255))
-        s = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-        pygame.draw.circle(s, (*self.color, alpha), (self.size, self.size), self.size)
-        surf.blit(s, (self.x - self.size, self.y - self.size))
-
-
-# =========================
-# POWER-UPS
-# =========================
-POWER_TYPES = [
-    ("speed", CYAN),     # faster for a short time
-    ("slow", PURPLE),    # slower for a short time
-    ("bonus", GOLD),     # +3 instant points
-]
-
-class PowerUp:
-    def __init__(self, kind, pos):
-        self.kind = kind
-        self.color = dict(POWER_TYPES)[kind]
-        self.pos = pos[:]  # grid position [x, y]
-        self.spawn_time = pygame.time.get_ticks()
-
-    def alive(self):
-        return pygame.time.get_ticks() - self.spawn_time < POWERUP_TTL
-
-    def rect(self):
-        return pygame.Rect(self.pos[0], self.pos[1], GRID, GRID)
-
-    def draw(self):
-        t = (pygame.time.get_ticks() // 200) % 6
-        pul = 2 + t  # pulsing size
-        r = pygame.Rect(self.pos[0] - pul//2, self.pos[1] - pul//2, GRID + pul, GRID + pul)
-        rounded_rect(SCREEN, self.color, r, radius=8)
-        inner = pygame.Rect(self.pos[0]+4, self.pos[1]+4, GRID-8, GRID-8)
-        rounded_rect(SCREEN, (255, 255, 255), inner, radius=6)
-
-
-# =========================
-# OBSTACLES
-# =========================
-class MovingObstacle:
-    def __init__(self, rect, dx):
-        self.rect = pygame.Rect(rect)
-        self.dx = dx
-
-    def update(self):
-        self.rect.x += self.dx
-        if self.rect.right >= WIDTH or self.rect.left <= 0:
-            self.dx *= -1
-
-    def draw(self):
-        rounded_rect(SCREEN, (90, 90, 110), self.rect, radius=6)
-
-
-def make_obstacles():
-    obs = []
-    taken = set()
-
-    # Static obstacles
-    for _ in range(NUM_STATIC_OBSTACLES):
-        while True:
-            x = random.randrange(1, WIDTH // GRID - 1) * GRID
-            y = random.randrange(2, HEIGHT // GRID - 1) * GRID
-            if (x, y) not in taken and (WIDTH//2 - 3*GRID <= x <= WIDTH//2 + 3*GRID) is False:
-                taken.add((x, y))
-                w = random.choice([GRID*2, GRID*3])
-                h = random.choice([GRID, GRID*2])
-                obs.append(pygame.Rect(x, y, w, h))
-                break
-
-    # Moving obstacles
-    mobs = []
-    for _ in range(NUM_MOVING_OBSTACLES):
-        y = random.randrange(3, HEIGHT // GRID - 1) * GRID
-        w = GRID * random.choice([2, 3])
-        rect = (GRID, y, w, GRID)
-        dx = random.choice([2, 3])
-        mobs.append(MovingObstacle(rect, dx))
-
-    return obs, mobs
-
-
-# =========================
-# GAME STATE
-# =========================
-class Game:
-    def __init__(self):
-        self.reset_all()
-
-    def reset_all(self):
-        self.score = 0
-        self.high = 0
-        self.level = 1
-        self.lives = LIVES_START
-        self.snake = [[WIDTH // 2, HEIGHT // 2 + GRID], [WIDTH // 2, HEIGHT // 2]]
-        self.dir = (0, -GRID)  # moving up
-        self.next_dir = self.dir
-        self.food = self.spawn_food()
-        self.special_food = None
-        self.special_spawned_at = 0
-        self.particles = []
-        self.powerups = []
-        self.active_power = None  # (kind, end_time)
-        self.static_obstacles, self.moving_obstacles = make_obstacles()
-        self.start_time = pygame.time.get_ticks()
-        self.last_special_check = pygame.time.get_ticks()
-        self.tick_accum = 0
-        self.alive = True
-        self.paused = False
-
-    def reset_after_hit(self):
-        # Reduce life and reset snake position (keep score/level)
-        self.lives -= 1
-        if SOUND_ENABLED and SND_HIT:
-            SND_HIT.play()
-        self.snake = [[WIDTH // 2, HEIGHT // 2 + GRID], [WIDTH // 2, HEIGHT // 2]]
-        self.dir = (0, -GRID)
-        self.next_dir = self.dir
-        self.active_power = None
-
-    def spawn_food(self):
-        while True:
-            pos = grid_pos()
-            # avoid obstacles & snake body
-            bad = any(pygame.Rect(o).colliderect(pygame.Rect(pos[0], pos[1], GRID, GRID)) for o in self.static_obstacles) if hasattr(self, 'static_obstacles') else False
-            bad |= any(m.rect.colliderect(pygame.Rect(pos[0], pos[1], GRID, GRID)) for m in getattr(self, 'moving_obstacles', []))
-            if pos not in self.snake and not bad and pos[1] > GRID * 2:  # keep off the top UI bar
-                return pos
-
-    def spawn_special_food(self):
-        self.special_food = self.spawn_food()
-        self.special_spawned_at = pygame.time.get_ticks()
-
-    def maybe_spawn_powerup(self):
-        if random.random() < POWERUP_CHANCE:
-            kind, _ = random.choice(POWER_TYPES)
-            pos = self.spawn_food()
-            self.powerups.append(PowerUp(kind, pos))
-
-    def apply_power(self, kind):
-        end = pygame.time.get_ticks() + POWERUP_DURATION
-        if kind == "bonus":
-            self.score += 3
-        self.active_power = (kind, end)
-        if SOUND_ENABLED and SND_POWER:
-            SND_POWER.play()
-
-    def power_multiplier(self):
-        if self.active_power is None:
-            return 1.0
-        kind, end = self.active_power
-        if pygame.time.get_ticks() > end:
-            self.active_power = None
-            return 1.0
-        return 1.4 if kind == "speed" else (0.6 if kind == "slow" else 1.0)
-
-    def current_fps(self):
-        # level-based speed + power modifier, clamped
-        base = FPS_BASE + (self.level - 1) * 1.5
-        return max(6, min(MAX_FPS, int(base * self.power_multiplier())))
-
-    def update_level(self):
-        self.level = 1 + self.score // LEVEL_UP_EVERY
-
-    def handle_input(self, event):
-        if event.type == pygame.KEYDOWN:
-            if event.key in (pygame.K_w, pygame.K_UP) and self.dir[1] == 0:
-                self.next_dir = (0, -GRID)
-            elif event.key in (pygame.K_s, pygame.K_DOWN) and self.dir[1] == 0:
-                self.next_dir = (0, GRID)
-            elif event.key in (pygame.K_a, pygame.K_LEFT) and self.dir[0] == 0:
-                self.next_dir = (-GRID, 0)
-            elif event.key in (pygame.K_d, pygame.K_RIGHT) and self.dir[0] == 0:
-                self.next_dir = (GRID, 0)
-            elif event.key == pygame.K_p:
-                self.paused = not self.paused
-
-    def move_snake(self):
-        # update direction once per step
-        self.dir = self.next_dir
-        hx, hy = self.snake[-1]
-        nx, ny = hx + self.dir[0], hy + self.dir[1]
-        new_head = [nx, ny]
-        self.snake.append(new_head)
-
-    def trim_tail(self, grew=False):
-        if not grew:
-            self.snake.pop(0)
-
-    def check_collisions(self):
-        head = self.snake[-1]
-        rect_head = pygame.Rect(head[0], head[1], GRID, GRID)
-        # walls
-        if head[0] < 0 or head[0] >= WIDTH or head[1] < GRID*2 or head[1] >= HEIGHT:
-            return True
-        # self
-        if head in self.snake[:-1]:
-            return True
-        # obstacles
-        for o in self.static_obstacles:
-            if rect_head.colliderect(o):
-                return True
-        for m in self.moving_obstacles:
-            if rect_head.colliderect(m.rect):
-                return True
-        return False
-
-    def eat_food(self):
-        head = self.snake[-1]
-        ate = head[0] == self.food[0] and head[1] == self.food[1]
-        if ate:
-            self.score += 1
-            self.update_level()
-            self.spawn_eat_particles(self.food)
-            if SOUND_ENABLED and SND_EAT:
-                SND_EAT.play()
-            self.food = self.spawn_food()
-            self.maybe_spawn_powerup()
-        return ate
-
-    def eat_special_food(self):
-        if not self.special_food:
-            return False
-        head = self.snake[-1]
-        if head[0] == self.special_food[0] and head[1] == self.special_food[1]:
-            self.score += SPECIAL_FOOD_VALUE
-            self.update_level()
-            self.spawn_eat_particles(self.special_food, color=GOLD)
-            self.special_food = None
-            return True
-        return False
-
-    def pickup_powerup(self):
-        head = self.snake[-1]
-        head_rect = pygame.Rect(head[0], head[1], GRID, GRID)
-        for i, p in enumerate(list(self.powerups)):
-            if head_rect.colliderect(p.rect()):
-                self.apply_power(p.kind)
-                self.spawn_eat_particles(p.pos, color=p.color)
-                self.powerups.pop(i)
-                return True
-        return False
-
-    def spawn_eat_particles(self, pos, color=GREEN):
-        for _ in range(18):
-            ang = random.random() * math.tau
-            spd = random.uniform(60, 140)
-            vx, vy = math.cos(ang) * spd, math.sin(ang) * spd
-            self.particles.append(Particle((pos[0] + GRID/2, pos[1] + GRID/2), (vx, vy), 450, random.randint(2, 4), color))
-
-    def update_particles(self, dt):
-        self.particles = [p for p in self.particles if p.update(dt)]
-
-    def update(self, dt):
-        # moving obstacles
-        for m in self.moving_obstacles:
-            m.update()
-
-        # special food spawn/expire
-        now = pygame.time.get_ticks()
-        if not self.special_food and now - self.last_special_check > SPECIAL_FOOD_EVERY * 1000:
-            # 50% chance to spawn
-            self.last_special_check = now
-            if random.random() < 0.5:
-                self.spawn_special_food()
-        if self.special_food and now - self.special_spawned_at > SPECIAL_FOOD_TTL:
-            self.special_food = None
-
-        # clean expired powerups
-        self.powerups = [p for p in self.powerups if p.alive()]
-
-        # particles
-        self.update_particles(dt)
-
-    def draw_snake(self):
-        # draw with head highlight and slight shadow
-        for i, seg in enumerate(self.snake):
-            x, y = seg
-            shadow = pygame.Rect(x+2, y+2, GRID, GRID)
-            rounded_rect(SCREEN, (0,0,0,50), shadow, radius=6)
-            color = (80, 220, 140) if i < len(self.snake)-1 else (120, 255, 170)
-            rounded_rect(SCREEN, color, (x, y, GRID, GRID), radius=8)
-
-    def draw_foods(self):
-        # normal food (pulsing)
-        fx, fy = self.food
-        t = pygame.time.get_ticks() / 200.0
-        pul = int((math.sin(t) + 1) * 2)  # 0..4
-        r = pygame.Rect(fx - pul//2, fy - pul//2, GRID + pul, GRID + pul)
-        rounded_rect(SCREEN, GREEN, r, radius=8)
-
-        # special food (gold)
-        if self.special_food:
-            sx, sy = self.special_food
-            pul = int((math.sin(t*1.5) + 1) * 3)
-            r2 = pygame.Rect(sx - pul//2, sy - pul//2, GRID + pul, GRID + pul)
-            rounded_rect(SCREEN, GOLD, r2, radius=8)
-            inner = pygame.Rect(sx+5, sy+5, GRID-10, GRID-10)
-            rounded_rect(SCREEN, (255,255,255), inner, radius=6)
-
-    def draw_powerups(self):
-        for p in self.powerups:
-            p.draw()
-
-    def draw_obstacles(self):
-        for o in self.static_obstacles:
-            rounded_rect(SCREEN, (90, 90, 110), o, radius=6)
-        for m in self.moving_obstacles:
-            m.draw()
-
-
-# =========================
-# SCREENS
-# =========================
-
-def draw_center_text(lines):
-    y = HEIGHT // 2 - (len(lines) * 28) // 2
-    for text, font, color in lines:
-        surf = font.render(text, True, color)
-        SCREEN.blit(surf, (WIDTH // 2 - surf.get_width() // 2, y))
-        y += surf.get_height() + 8
-
-
-def start_screen():
-    while True:
-        for e in pygame.event.get():
-            if e.type == pygame.QUIT:
-                pygame.quit(); raise SystemExit
-            if e.type == pygame.KEYDOWN or e.type == pygame.MOUSEBUTTONDOWN:
-                return
-        draw_gradient_bg()
-        title = [("S N A K E  –  D E L U X E", FONT_HUGE, WHITE),
-                 ("Arrows/WASD to move •  P to Pause", FONT_BIG, (210, 210, 220)),
-                 ("Avoid obstacles • Eat gold for +5 ", FONT, (200,200,210)),
-                 ("Press any key to start", FONT_BIG, GREEN)]
-        draw_center_text(title)
-        pygame.display.flip()
-        CLOCK.tick(60)
-
-
-def game_over_screen(game):
-    while True:
-        for e in pygame.event.get():
-            if e.type == pygame.QUIT:
-                pygame.quit(); raise SystemExit
-            if e.type == pygame.KEYDOWN:
-                if e.key == pygame.K_r:
-                    return True
-                if e.key in (pygame.K_q, pygame.K_ESCAPE):
-                    return False
-        draw_gradient_bg()
-        draw_center_text([
-            ("Game Over", FONT_HUGE, RED),
-            (f"Score: {game.score}   High: {game.high}", FONT_BIG, WHITE),
-            ("Press R to Restart  •  Q to Quit", FONT_BIG, (210,210,220)),
-        ])
-        pygame.display.flip()
-        CLOCK.tick(60)
-
-def main():
-    game = Game()
-    start_screen()
-
-    running = True
-    step_timer = 0.0
-
-    while running:
-        dt = CLOCK.tick(60) / 1000.0
-        step_timer += dt
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            game.handle_input(event)
-
-        if game.paused:
-            # simple pause overlay
-            draw_gradient_bg()
-            draw_scoreboard(game.score, game.level, game.lives, game.high)
-            game.draw_obstacles()
-            game.draw_snake()
-            game.draw_foods()
-            game.draw_powerups()
-            for p in game.particles:
-                p.draw(SCREEN)
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0,0,0,120))
-            SCREEN.blit(overlay, (0,0))
-            txt = FONT_BIG.render("Paused (press P)", True, WHITE)
-            SCREEN.blit(txt, (WIDTH//2 - txt.get_width()//2, HEIGHT//2 - 20))
-            pygame.display.flip()
-            continue
-
-        # fixed-step logic based on current FPS target
-        target_step = 1.0 / game.current_fps()
-        while step_timer >= target_step:
-            step_timer -= target_step
-
-            # advance snake one cell
-            game.move_snake()
-
-            grew = False
-            if game.eat_food():
-                grew = True
-            if game.eat_special_food():
-                grew = True
-
-            # powerup pickup
-            game.pickup_powerup()
-
-            # trim tail if not grown this step
-            game.trim_tail(grew)
-
-            # collisions
-            if game.check_collisions():
-                game.reset_after_hit()
-                if game.lives <= 0:
-                    game.high = max(game.high, game.score)
-                    if not game_over_screen(game):
-                        running = False
-                        break
-                    # restart
-                    game = Game()
-                    step_timer = 0
-                    continue
-
-            # update world state (obstacles, particles, timers)
-            game.update(target_step)
-
-        # RENDER
-        draw_gradient_bg()
-        draw_scoreboard(game.score, game.level, game.lives, max(game.high, game.score))
-        game.draw_obstacles()
-        game.draw_foods()
-        game.draw_powerups()
-        game.draw_snake()
-        for p in game.particles:
-            p.draw(SCREEN)
-
-        # active power indicator
-        if game.active_power:
-            kind, end = game.active_power
-            remain = max(0, end - pygame.time.get_ticks()) / 1000.0
-            txt = FONT.render(f"{kind.upper()} {remain:0.1f}s", True, CYAN if kind=="speed" else PURPLE if kind=="slow" else GOLD)
-            SCREEN.blit(txt, (WIDTH - txt.get_width() - 10, HEIGHT - txt.get_height() - 8))
-
-        pygame.display.flip()
-
-    pygame.quit()
-
-
-if __name__ == "__main__":
-    main()
+import argparse
+import contextlib
+import csv
+import json
+import math
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+
+STARTUP_T0 = time.perf_counter()
+
+import numpy as np
+import pygame
+
+from snake_core import (
+    WIDTH, HEIGHT, GRID,
+    GREEN, GOLD, PURPLE, CYAN,
+    UP, DOWN, LEFT, RIGHT, DIRECTIONS, POWER_TYPES,
+    STEP_GAME_OVER,
+    Game, RealClock, StepClock, cell_xy,
+)
+from snake_replay import Recorder, Replay
+
+# =========================
+# CONFIG & CONSTANTS
+# =========================
+# pygame subsystems start when first needed: video in open_window(), fonts
+# in get_font(), the mixer in sound().
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GRAY = (40, 40, 48)
+MID = (70, 72, 82)
+RED = (220, 68, 90)
+BLUE = (50, 153, 213)
+
+# UI font sizes; text_surface() loads the font on first use
+FONT_NAME = "bahnschrift"
+FONT_FILE = None  # a bundled .ttf/.otf to use instead of looking up FONT_NAME
+FONT = 22
+FONT_BIG = 36
+FONT_HUGE = 48
+
+CAPTION = "Snake – Deluxe"
+SCREEN = None  # the surface frames are drawn on; see open_window()
+GPU = None     # GpuCanvas when the SDL2 texture backend is active
+UPSCALER = None  # Upscaler when SCREEN is scaled onto the window by hand
+CLOCK = pygame.time.Clock()
+FRAME_RATE = 60  # render loop cap
+
+# Sound (optional). Leave False if you don't have files.
+SOUND_ENABLED = False
+SOUND_FILES = {"eat": "eat.wav", "power": "power.wav", "hit": "hit.wav"}
+
+# Key bindings -> simulation directions
+KEY_DIRS = {
+    pygame.K_w: UP, pygame.K_UP: UP,
+    pygame.K_s: DOWN, pygame.K_DOWN: DOWN,
+    pygame.K_a: LEFT, pygame.K_LEFT: LEFT,
+    pygame.K_d: RIGHT, pygame.K_RIGHT: RIGHT,
+}
+
+# =========================
+# UTILITIES
+# =========================
+
+def ticks():
+    """Milliseconds since startup, for animations (needs no SDL timer)."""
+    return int((time.perf_counter() - STARTUP_T0) * 1000)
+
+
+# Finding a system font by family name means scanning every installed font
+# (fc-list on Linux), so the answer is kept in a small JSON file, keyed by
+# the newest mtime of the usual font directories. Installing or removing
+# fonts there invalidates it; the path is per family, as size doesn't
+# affect which file is picked.
+FONT_CACHE = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                          "snake-deluxe", "fonts.json")
+FONT_DIRS = (
+    "/usr/share/fonts", "/usr/local/share/fonts", "~/.fonts", "~/.local/share/fonts",
+    "/Library/Fonts", "/System/Library/Fonts", "~/Library/Fonts",
+    os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+)
+_fonts = {}
+_font_paths = {}  # family -> path, once per process
+
+
+def _font_dirs_mtime():
+    # Fonts usually land in a subfolder (e.g. /usr/share/fonts/truetype/x),
+    # which only touches that folder's mtime, so every directory counts.
+    newest = 0.0
+    for d in FONT_DIRS:
+        for root, _, _ in os.walk(os.path.expanduser(d)):
+            try:
+                newest = max(newest, os.stat(root).st_mtime)
+            except OSError:
+                pass
+    return newest
+
+
+def find_font(name):
+    """Path of the system font `name` (None for pygame's default), cached on disk."""
+    if name not in _font_paths:
+        _font_paths[name] = _lookup_font(name)
+    return _font_paths[name]
+
+
+def _lookup_font(name):
+    mtime = _font_dirs_mtime()
+    try:
+        with open(FONT_CACHE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if cache.get("mtime") != mtime:
+        cache = {"mtime": mtime, "fonts": {}}
+    fonts = cache["fonts"]
+    if name in fonts and (fonts[name] is None or os.path.exists(fonts[name])):
+        return fonts[name]
+    fonts[name] = pygame.font.match_font(name)
+    try:
+        os.makedirs(os.path.dirname(FONT_CACHE), exist_ok=True)
+        tmp = FONT_CACHE + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp, FONT_CACHE)
+    except OSError:
+        pass
+    return fonts[name]
+
+
+def get_font(size):
+    font = _fonts.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        path = FONT_FILE or find_font(FONT_NAME)
+        font = _fonts[size] = pygame.font.Font(path, size)
+    return font
+
+
+_sounds = None
+
+
+def sound(name):
+    """The named sound effect, or None; the mixer starts on first use."""
+    global _sounds, SOUND_ENABLED
+    if not SOUND_ENABLED:
+        return None
+    if _sounds is None:
+        try:
+            pygame.mixer.init()
+            _sounds = {n: pygame.mixer.Sound(f) for n, f in SOUND_FILES.items()}
+        except Exception:
+            SOUND_ENABLED = False
+            return None
+    return _sounds.get(name)
+
+
+def play_sound(name):
+    snd = sound(name)
+    if snd:
+        snd.play()
+
+
+_startup = []  # (phase, perf_counter when it finished)
+
+
+def startup_mark(phase):
+    """Note that a startup phase just finished (only its first time counts)."""
+    if all(p != phase for p, _ in _startup):
+        _startup.append((phase, time.perf_counter()))
+
+
+def startup_report():
+    """Time spent in each startup phase, from module import on."""
+    lines, prev = [], STARTUP_T0
+    for phase, t in _startup:
+        lines.append(f"{phase:<12} {(t - prev) * 1000:8.1f} ms")
+        prev = t
+    first = dict(_startup).get("menu frame")
+    if first:
+        lines.append(f"{'first frame':<12} {(first - STARTUP_T0) * 1000:8.1f} ms after import began")
+    return "\n".join(lines)
+
+
+def new_surface(size):
+    """An opaque surface in the display's pixel format, if there is one."""
+    surf = pygame.Surface(size)
+    return surf.convert() if pygame.display.get_surface() else surf
+
+
+def draw_scoreboard_chrome(surface):
+    bar_h = 36
+    pygame.draw.rect(surface, (22, 22, 30), (0, 0, WIDTH, bar_h))
+    pygame.draw.line(surface, MID, (0, bar_h), (WIDTH, bar_h), 2)
+
+
+def draw_scoreboard(score, level, lives, high, target=None):
+    # the bar itself is baked into level_layer()
+    target = target or SCREEN
+    txt = text_surface(FONT, f"Score: {score}", WHITE)
+    lvl = text_surface(FONT, f"Level: {level}", WHITE)
+    life = text_surface(FONT, "❤ " * lives, RED)
+    hi = text_surface(FONT, f"High: {high}", GOLD)
+
+    target.blit(txt, (10, 8))
+    target.blit(lvl, (150, 8))
+    target.blit(hi, (WIDTH - hi.get_width() - 10, 8))
+    target.blit(life, (WIDTH // 2 - life.get_width() // 2, 6))
+
+
+def rounded_rect(surface, color, rect, radius=6):
+    pygame.draw.rect(surface, color, rect, border_radius=radius)
+
+
+# =========================
+# CACHED LAYERS
+# =========================
+# Static parts of the frame are rendered once and blitted in one call.
+# Each layer is rebuilt only when its key (window size, level layout)
+# changes.
+_layers = {}  # name -> (key, surface)
+
+
+def cached_layer(name, key, build):
+    hit = _layers.get(name)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    surf = build()
+    _layers[name] = (key, surf)
+    return surf
+
+
+def _build_gradient(size):
+    w, h = size
+    surf = new_surface(size)
+    top = (18, 18, 24)
+    bottom = (28, 28, 40)
+    for i in range(h):
+        t = i / h
+        r = int(top[0] * (1 - t) + bottom[0] * t)
+        g = int(top[1] * (1 - t) + bottom[1] * t)
+        b = int(top[2] * (1 - t) + bottom[2] * t)
+        pygame.draw.line(surf, (r, g, b), (0, i), (w, i))
+    return surf
+
+
+def gradient_layer():
+    size = SCREEN.get_size()
+    return cached_layer("gradient", size, lambda: _build_gradient(size))
+
+
+def level_layer(game):
+    """Gradient + scoreboard bar + static obstacles for the current level."""
+    def build():
+        surf = gradient_layer().copy()
+        draw_scoreboard_chrome(surf)
+        for o in game.static_obstacles:
+            rounded_rect(surf, OBSTACLE, o, radius=6)
+        return surf
+    key = (SCREEN.get_size(), tuple(game.static_obstacles))
+    return cached_layer("level", key, build)
+
+
+# =========================
+# TEXT CACHE
+# =========================
+# Rendered strings keyed by (font size, text, color), least recently used
+# evicted first. HUD text is only re-rendered when its value changes.
+TEXT_CACHE_SIZE = 128
+_text_cache = OrderedDict()
+
+
+def text_surface(font, text, color):
+    """`text` antialiased in the UI font at size `font`, cached."""
+    key = (font, text, color)
+    surf = _text_cache.get(key)
+    if surf is not None:
+        _text_cache.move_to_end(key)
+        return surf
+    surf = get_font(font).render(text, True, color)
+    _text_cache[key] = surf
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return surf
+
+
+# =========================
+# PARTICLES (for juice)
+# =========================
+# Particles live in a fixed-capacity pool stored as parallel NumPy arrays
+# (structure of arrays), so a frame's update is a handful of vector ops.
+# Dead slots are reused by later bursts. Each particle is drawn with a
+# pre-rendered circle sprite picked by colour, radius and one of
+# PARTICLE_ALPHA_STEPS fade levels.
+PARTICLE_CAPACITY = 512
+PARTICLE_ALPHA_STEPS = 16
+_particle_sprites = {}  # (color, size, fade step or None) -> Surface
+
+# Level of detail, stepped by ParticleBudget: (particles per burst,
+# radius bonus so fewer particles still read as a burst, alpha fade).
+PARTICLE_LOD = (
+    (18, 0, True),
+    (10, 1, True),
+    (6, 1, False),
+)
+
+
+def particle_sprite(color, size, step):
+    """Circle sprite; `step` None gives an opaque colorkeyed sprite."""
+    key = (color, size, step)
+    surf = _particle_sprites.get(key)
+    if surf is None:
+        surf = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA if step is not None else 0)
+        if step is None:
+            surf.fill(BLACK)
+            surf.set_colorkey(BLACK, pygame.RLEACCEL)
+            pygame.draw.circle(surf, color, (size, size), size)
+        else:
+            alpha = 255 - step * 255 // PARTICLE_ALPHA_STEPS
+            pygame.draw.circle(surf, (*color, alpha), (size, size), size)
+        _particle_sprites[key] = surf
+    return surf
+
+
+class ParticleBudget:
+    """Picks a PARTICLE_LOD level from measured frame work time.
+
+    Feed it each frame's work time (CLOCK.get_rawtime()). When the running
+    average nears the frame budget effects step down a level; when there is
+    plenty of headroom they step back up. `settle` frames must pass between
+    changes so one slow frame doesn't make effects flicker. Call `reset()`
+    after a menu or pause so the wait isn't counted as frame time.
+    """
+
+    def __init__(self, budget_ms=1000 / FRAME_RATE, settle=30):
+        self.budget = budget_ms
+        self.settle = settle
+        self.avg = 0.0
+        self.level = 0
+        self.wait = 0
+        self.skip = 0
+
+    def reset(self):
+        # skip the frame that ends the wait and the full redraw after it
+        self.skip = 2
+
+    def observe(self, ms):
+        if self.skip:
+            self.skip -= 1
+            return self.level
+        self.avg += (ms - self.avg) * 0.1
+        if self.wait:
+            self.wait -= 1
+        elif self.avg > self.budget * 0.85 and self.level < len(PARTICLE_LOD) - 1:
+            self.level += 1
+            self.wait = self.settle
+        elif self.avg < self.budget * 0.5 and self.level > 0:
+            self.level -= 1
+            self.wait = self.settle
+        return self.level
+
+
+class ParticleSystem:
+    def __init__(self, capacity=PARTICLE_CAPACITY):
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.age = np.zeros(capacity, np.float32)   # ms
+        self.life = np.ones(capacity, np.float32)   # ms
+        self.size = np.zeros(capacity, np.int32)
+        self.color = np.zeros(capacity, np.int32)   # index into palette
+        self.alive = np.zeros(capacity, bool)
+        self.palette = []
+        self._color_index = {}
+        self.count = 0
+        self.lod = 0  # index into PARTICLE_LOD
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.alive[:] = False
+        self.count = 0
+
+    def emit(self, x, y, vx, vy, life, size, color):
+        """Add a burst; per-particle args are sequences. Drops what doesn't fit."""
+        slots = np.flatnonzero(~self.alive)[:len(vx)]
+        n = len(slots)
+        if not n:
+            return
+        ci = self._color_index.get(color)
+        if ci is None:
+            ci = self._color_index[color] = len(self.palette)
+            self.palette.append(color)
+        self.x[slots] = x
+        self.y[slots] = y
+        self.vx[slots] = vx[:n]
+        self.vy[slots] = vy[:n]
+        self.age[slots] = 0
+        self.life[slots] = life
+        self.size[slots] = size[:n]
+        self.color[slots] = ci
+        self.alive[slots] = True
+        self.count += n
+
+    def update(self, dt):
+        if not self.count:
+            return
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.age += dt * 1000
+        self.alive &= self.age < self.life
+        self.count = int(np.count_nonzero(self.alive))
+
+    def _live(self):
+        idx = np.flatnonzero(self.alive)
+        size = self.size[idx]
+        return idx, size, (self.x[idx] - size).astype(np.int32), (self.y[idx] - size).astype(np.int32)
+
+    def bounds(self):
+        """Rect covering every live particle, or None."""
+        if not self.count:
+            return None
+        _, size, x, y = self._live()
+        left, top = int(x.min()), int(y.min())
+        return pygame.Rect(left, top, int((x + size * 2).max()) - left, int((y + size * 2).max()) - top)
+
+    def draw(self, surf):
+        surf.blits(self.sprites(), False)
+
+    def sprites(self):
+        """(sprite, dest) for every live particle."""
+        if not self.count:
+            return []
+        idx, size, x, y = self._live()
+        palette = self.palette
+        if PARTICLE_LOD[self.lod][2]:
+            step = np.minimum(self.age[idx] * PARTICLE_ALPHA_STEPS / self.life[idx], PARTICLE_ALPHA_STEPS - 1)
+            step = step.astype(np.int32).tolist()
+        else:
+            step = [None] * len(idx)
+        return [(particle_sprite(palette[c], s, f), (px, py))
+                for c, s, f, px, py in zip(self.color[idx].tolist(), size.tolist(), step, x.tolist(), y.tolist())]
+
+
+def spawn_eat_particles(particles, rng, pos, color=GREEN):
+    # `rng` is the game's cosmetic stream so effects never shift gameplay
+    count, bonus, _ = PARTICLE_LOD[particles.lod]
+    vx, vy, size = [], [], []
+    for _ in range(count):
+        ang = rng.random() * math.tau
+        spd = rng.uniform(60, 140)
+        vx.append(math.cos(ang) * spd)
+        vy.append(math.sin(ang) * spd)
+        size.append(rng.randint(2, 4) + bonus)
+    particles.emit(pos[0] + GRID/2, pos[1] + GRID/2, vx, vy, 450, size, color)
+
+
+def play_events(game, particles):
+    """Turn the simulation's pickup/hit events into sounds and particles."""
+    for kind, pos, color in game.events:
+        if kind == "hit":
+            play_sound("hit")
+            continue
+        spawn_eat_particles(particles, game.fx_rng, pos, color)
+        if kind in ("eat", "power"):
+            play_sound(kind)
+
+
+# =========================
+# SPRITE ATLAS
+# =========================
+# Every tile the game draws (snake body/head/shadow, each food and power-up
+# pulse frame, moving obstacle blocks) is rasterised once into a single
+# colorkeyed atlas sheet. Software blits from one RLE sheet with an area are
+# slow, so each tile is also cut out as its own RLE surface; frames are drawn
+# with one Surface.blits call of (sprite, dest) entries.
+SNAKE_BODY = (80, 220, 140)
+SNAKE_HEAD = (120, 255, 170)
+OBSTACLE = (90, 90, 110)
+ATLAS_KEY = (255, 0, 255)
+ATLAS_WIDTH = 512
+FOOD_PULSES = range(0, 5)      # pixels of growth while pulsing
+SPECIAL_PULSES = range(0, 7)
+POWER_PULSES = range(2, 8)
+
+
+def _atlas_sprites():
+    """(key, (w, h), draw(surface, x, y)) for every atlas tile."""
+    def tile(color, size, radius, inner=None):
+        def draw(surf, x, y):
+            rounded_rect(surf, color, (x, y, size, size), radius=radius)
+            if inner:
+                off, isize = inner
+                rounded_rect(surf, (255, 255, 255), (x + off, y + off, isize, isize), radius=6)
+        return draw
+
+    def block(w, h):
+        return lambda surf, x, y: rounded_rect(surf, OBSTACLE, (x, y, w, h), radius=6)
+
+    # shadow colour has an alpha the opaque display ignores, so it is black
+    yield "shadow", (GRID, GRID), tile((0, 0, 0), GRID, 6)
+    yield "body", (GRID, GRID), tile(SNAKE_BODY, GRID, 8)
+    yield "head", (GRID, GRID), tile(SNAKE_HEAD, GRID, 8)
+    for pul in FOOD_PULSES:
+        yield ("food", pul), (GRID + pul, GRID + pul), tile(GREEN, GRID + pul, 8)
+    for pul in SPECIAL_PULSES:
+        yield ("special", pul), (GRID + pul, GRID + pul), tile(GOLD, GRID + pul, 8, (5 + pul // 2, GRID - 10))
+    for _, color in POWER_TYPES:
+        for pul in POWER_PULSES:
+            yield ("power", color, pul), (GRID + pul, GRID + pul), tile(color, GRID + pul, 8, (4 + pul // 2, GRID - 8))
+    for w in (GRID * 2, GRID * 3):
+        yield ("block", w, GRID), (w, GRID), block(w, GRID)
+
+
+class Atlas:
+    """One sheet holding every sprite (`surface`, `areas` by key), plus
+    each sprite cut out on its own (`sprites` by key)."""
+
+    def __init__(self):
+        sprites = list(_atlas_sprites())
+        # shelf packing, 1px gutter
+        self.areas = {}
+        x = y = shelf = 0
+        for key, (w, h), _ in sprites:
+            if x + w > ATLAS_WIDTH:
+                x, y, shelf = 0, y + shelf + 1, 0
+            self.areas[key] = pygame.Rect(x, y, w, h)
+            x += w + 1
+            shelf = max(shelf, h)
+        self.surface = new_surface((ATLAS_WIDTH, y + shelf))
+        self.surface.fill(ATLAS_KEY)
+        self.sprites = {}
+        for key, _, draw in sprites:
+            r = self.areas[key]
+            draw(self.surface, r.x, r.y)
+            sprite = self.surface.subsurface(r).copy()
+            sprite.set_colorkey(ATLAS_KEY, pygame.RLEACCEL)
+            self.sprites[key] = sprite
+        self.surface.set_colorkey(ATLAS_KEY)
+
+    def entry(self, key, pos):
+        """A (sprite, dest) tuple for Surface.blits."""
+        return self.sprites[key], pos
+
+
+_atlas = None
+
+
+def atlas():
+    global _atlas
+    if _atlas is None:
+        _atlas = Atlas()
+    return _atlas
+
+
+def draw_snake(game, segments=None, target=None):
+    draw_segments(game.segments() if segments is None else segments, target=target)
+
+
+def draw_segments(segments, indices=None, target=None):
+    # draw with head highlight and slight shadow; `indices` limits drawing
+    # to some segments (still tail to head so overlaps stack the same way)
+    if indices is None:
+        indices = range(len(segments))
+    sprites = atlas().sprites
+    shadow, body, head = sprites["shadow"], sprites["body"], sprites["head"]
+    last = len(segments) - 1
+    seq = []
+    for i in indices:
+        x, y = segments[i]
+        seq.append((shadow, (x + 2, y + 2)))
+        seq.append((body if i < last else head, (x, y)))
+    (target or SCREEN).blits(seq, False)
+
+
+def draw_foods(game, target=None):
+    # normal food (pulsing); None when the board is full
+    a = atlas()
+    t = ticks() / 200.0
+    seq = []
+    if game.food:
+        fx, fy = game.food
+        pul = int((math.sin(t) + 1) * 2)  # 0..4
+        seq.append(a.entry(("food", pul), (fx - pul//2, fy - pul//2)))
+
+    # special food (gold)
+    if game.special_food:
+        sx, sy = game.special_food
+        pul = int((math.sin(t*1.5) + 1) * 3)
+        seq.append(a.entry(("special", pul), (sx - pul//2, sy - pul//2)))
+    (target or SCREEN).blits(seq, False)
+
+
+def draw_powerups(game, target=None):
+    a = atlas()
+    pul = 2 + (ticks() // 200) % 6  # pulsing size
+    (target or SCREEN).blits([a.entry(("power", p.color, pul), (p.pos[0] - pul//2, p.pos[1] - pul//2))
+                  for p in game.powerups], False)
+
+
+def draw_obstacles(game, xs=None, target=None):
+    # static obstacles are baked into level_layer(); `xs` overrides the
+    # moving ones' x positions (interpolated frames)
+    target = target or SCREEN
+    a = atlas()
+    for i, m in enumerate(game.moving_obstacles):
+        x = m.x if xs is None else xs[i]
+        key = ("block", m.w, m.h)
+        if key in a.areas:
+            target.blit(*a.entry(key, (x, m.y)))
+        else:
+            rounded_rect(target, OBSTACLE, (x, m.y, m.w, m.h), radius=6)
+
+
+def draw_power_indicator(game, target=None):
+    if game.active_power:
+        kind, _ = game.active_power
+        remain = game.power_remaining()
+        txt = text_surface(FONT, f"{kind.upper()} {remain:0.1f}s", CYAN if kind=="speed" else PURPLE if kind=="slow" else GOLD)
+        (target or SCREEN).blit(txt, (WIDTH - txt.get_width() - 10, HEIGHT - txt.get_height() - 8))
+
+
+def draw_scene(game, particles, pose=None, target=None):
+    """Draw a full game frame onto SCREEN, or `target` (no flip).
+
+    `pose` is an interpolated (segments, obstacle xs) from Motion.pose().
+    `target` only needs blit() and blits(), e.g. a GpuCanvas.
+    """
+    target = target or SCREEN
+    segments, xs = pose or (None, None)
+    with profile("background"):
+        target.blit(level_layer(game), (0, 0))
+    with profile("draw_scoreboard"):
+        draw_scoreboard(game.score, game.level, game.lives, max(game.high, game.score), target)
+    with profile("draw_obstacles"):
+        draw_obstacles(game, xs, target)
+    with profile("draw_foods"):
+        draw_foods(game, target)
+        draw_powerups(game, target)
+    with profile("draw_snake"):
+        draw_snake(game, segments, target)
+    with profile("particles"):
+        particles.draw(target)
+    draw_power_indicator(game, target)
+
+
+# =========================
+# INTERPOLATION
+# =========================
+# The simulation steps 6-30 times a second; with --smooth the render loop
+# runs at display rate and draws the snake and moving obstacles part way
+# between the last two steps, by the fraction of the next step already
+# elapsed. Interpolated frames move every segment, so they always repaint
+# in full.
+
+class Motion:
+    """Positions of what moves at the last two steps."""
+
+    def __init__(self, game):
+        self.prev = self.cur = self.capture(game)
+
+    @staticmethod
+    def capture(game):
+        return game.segments(), [m.x for m in game.moving_obstacles]
+
+    def push(self, game):
+        self.prev, self.cur = self.cur, self.capture(game)
+
+    def pose(self, alpha):
+        """(segments, obstacle xs) `alpha` (0..1) of the way from prev to cur."""
+        (old, old_xs), (new, new_xs) = self.prev, self.cur
+        # segments line up from the head; a grown tail has no old position
+        # and stays put. Anything that jumped further than a cell (respawn
+        # after a hit, several steps between frames) is drawn where it is.
+        segments = list(new)
+        for k in range(1, min(len(old), len(new)) + 1):
+            (ox, oy), (nx, ny) = old[-k], new[-k]
+            if abs(nx - ox) + abs(ny - oy) <= GRID:
+                segments[-k] = (round(ox + (nx - ox) * alpha), round(oy + (ny - oy) * alpha))
+        xs = new_xs
+        if len(old_xs) == len(new_xs):
+            xs = [round(o + (n - o) * alpha) if abs(n - o) <= GRID else n
+                  for o, n in zip(old_xs, new_xs)]
+        return segments, xs
+
+
+# =========================
+# WINDOW & SDL2 TEXTURE BACKEND
+# =========================
+# The default backend draws with software blits onto the display surface.
+# The "sdl2" backend opens the window through pygame._sdl2.video instead:
+# the atlas sheet, cached layers, text and particle sprites are uploaded
+# as textures the first time they are drawn, and frames are built from
+# texture copies the renderer can do on the GPU and scale to any window
+# size. Menus and the pause screen still draw in software onto SCREEN (an
+# offscreen surface in that mode) and are shown with present().
+#
+# Frames are always drawn at the logical WIDTH x HEIGHT. A bigger or
+# fullscreen window is filled by scaling on present: by SDL's renderer
+# (pygame.SCALED, or the sdl2 backend's logical size), so a 4K screen costs
+# about what the 600x400 window does, or, where SCALED isn't available, by
+# an Upscaler doing one scale pass per frame.
+
+class GpuCanvas:
+    """Draws blit()/blits() calls as texture copies on an SDL2 Renderer."""
+
+    def __init__(self, vsync=False, fullscreen=False):
+        from pygame._sdl2.video import Renderer, Texture, Window
+        self.Texture = Texture
+        self.window = Window(CAPTION, (WIDTH, HEIGHT), resizable=True, fullscreen_desktop=fullscreen)
+        try:
+            self.renderer = Renderer(self.window, vsync=vsync)
+        except RuntimeError:
+            self.window.destroy()  # don't leave it open beside the fallback window
+            raise
+        self.renderer.logical_size = (WIDTH, HEIGHT)
+        self.textures = weakref.WeakKeyDictionary()  # Surface -> Texture
+        self.sheet = None     # texture of the atlas sheet
+        self.sheet_of = {}    # atlas sprite surface -> its area on the sheet
+        self.screen = None    # streaming texture for present()
+
+    def texture(self, surf):
+        tex = self.textures.get(surf)
+        if tex is None:
+            tex = self.textures[surf] = self.Texture.from_surface(self.renderer, surf)
+        return tex
+
+    def _atlas(self):
+        a = atlas()
+        self.sheet = self.Texture.from_surface(self.renderer, a.surface)
+        self.sheet_of = {sprite: a.areas[key] for key, sprite in a.sprites.items()}
+
+    def blit(self, surf, dest, area=None):
+        if self.sheet is None:
+            self._atlas()
+        x, y = dest[0], dest[1]
+        r = self.sheet_of.get(surf)
+        if r is not None:
+            self.sheet.draw(srcrect=r, dstrect=(x, y, r.w, r.h))
+        elif area is not None:
+            area = pygame.Rect(area)
+            self.texture(surf).draw(srcrect=area, dstrect=(x, y, area.w, area.h))
+        else:
+            self.texture(surf).draw(dstrect=(x, y))
+
+    def blits(self, seq, doreturn=True):
+        for entry in seq:
+            self.blit(*entry)
+
+    def present_surface(self, surf):
+        """Show a software-drawn frame (menus, pause)."""
+        if self.screen is None:
+            self.screen = self.Texture(self.renderer, surf.get_size(), streaming=True)
+        self.screen.update(surf)
+        self.renderer.clear()
+        self.screen.draw()
+        self.renderer.present()
+
+    def render(self, game, particles, pose=None):
+        self.renderer.clear()
+        draw_scene(game, particles, pose, self)
+        if PROFILER:
+            PROFILER.draw(self)
+        with profile("present"):
+            self.renderer.present()
+
+
+class Upscaler:
+    """Scales the logical SCREEN onto a bigger window in one pass per frame.
+
+    The destination, the largest centred area of the window with the
+    playfield's aspect ratio, is worked out once per window size.
+    """
+
+    def __init__(self):
+        self.size = None
+        self.dest = None
+
+    def present(self, surf):
+        window = pygame.display.get_surface()
+        if window.get_size() != self.size:
+            self.size = ww, wh = window.get_size()
+            f = min(ww / WIDTH, wh / HEIGHT)
+            w, h = int(WIDTH * f), int(HEIGHT * f)
+            window.fill(BLACK)
+            self.dest = window.subsurface(((ww - w) // 2, (wh - h) // 2, w, h))
+        pygame.transform.scale(surf, self.dest.get_size(), self.dest)
+        pygame.display.flip()
+
+
+def open_window(backend="software", vsync=False, scaled=False, fullscreen=False):
+    """Create the game window; returns the backend actually in use.
+
+    "sdl2" falls back to "software" when pygame._sdl2 or a renderer is
+    unavailable. `vsync` is honoured where the driver allows it. `scaled`
+    opens a resizable window and `fullscreen` fills the screen, both showing
+    the WIDTH x HEIGHT frame scaled to fit.
+    """
+    global SCREEN, GPU, UPSCALER
+    pygame.display.init()
+    if backend == "sdl2":
+        try:
+            GPU = GpuCanvas(vsync, fullscreen)
+        except (ImportError, RuntimeError):  # pygame.error and _sdl2's error
+            GPU = None
+        else:
+            SCREEN = pygame.Surface((WIDTH, HEIGHT))
+            return "sdl2"
+    SCREEN = UPSCALER = None
+    size = (WIDTH, HEIGHT)
+    if vsync or scaled or fullscreen:
+        flags = pygame.SCALED | (pygame.FULLSCREEN if fullscreen else pygame.RESIZABLE)
+        for sync in ((1, 0) if vsync else (0,)):
+            try:
+                SCREEN = pygame.display.set_mode(size, flags, vsync=sync)
+                break
+            except pygame.error:
+                pass
+        if SCREEN is None and (scaled or fullscreen):
+            if fullscreen:
+                pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+            else:
+                pygame.display.set_mode(size, pygame.RESIZABLE)
+            UPSCALER = Upscaler()
+            SCREEN = new_surface(size)
+    if SCREEN is None:
+        SCREEN = pygame.display.set_mode(size)
+    pygame.display.set_caption(CAPTION)
+    return "software"
+
+
+def present():
+    """Show what has been drawn on SCREEN."""
+    if GPU:
+        GPU.present_surface(SCREEN)
+    elif UPSCALER:
+        UPSCALER.present(SCREEN)
+    else:
+        pygame.display.flip()
+
+
+# =========================
+# DIRTY-RECT RENDERING
+# =========================
+HUD_RECT = pygame.Rect(0, 0, WIDTH, 38)
+POWER_RECT = pygame.Rect(WIDTH - 180, HEIGHT - 40, 180, 40)
+
+
+def merge_rects(rects, bounds):
+    """Clip rects to `bounds` and union any that overlap."""
+    out = []
+    for r in rects:
+        r = pygame.Rect(r).clip(bounds)
+        if not r.w or not r.h:
+            continue
+        i = r.collidelist(out)
+        while i != -1:
+            r.union_ip(out.pop(i))
+            i = r.collidelist(out)
+        out.append(r)
+    return out
+
+
+class DirtyRenderer:
+    """Repaints only what changed and pushes it with display.update(rects).
+
+    Static content comes from level_layer(). Each frame the regions of the
+    new head, old head, vacated tail, foods, power-ups, moving obstacles,
+    particles and changed HUD text are restored from the layer and redrawn
+    clipped. Anything that repaints the whole screen (pause, menus) must
+    call invalidate() so the next frame is drawn in full.
+    """
+
+    def __init__(self):
+        self.layer = None
+        self.prev_rects = []   # animated regions drawn last frame
+        self.prev_cells = set()
+        self.prev_head = None
+        self.prev_hud = None
+        self.prev_power = False
+
+    def invalidate(self):
+        self.layer = None
+
+    def animated_rects(self, game, particles):
+        rects = [pygame.Rect(m.rect) for m in game.moving_obstacles]
+        if game.food:
+            rects.append(pygame.Rect(game.food[0] - 2, game.food[1] - 2, GRID + 4, GRID + 4))
+        if game.special_food:
+            rects.append(pygame.Rect(game.special_food[0] - 3, game.special_food[1] - 3, GRID + 6, GRID + 6))
+        for p in game.powerups:
+            rects.append(pygame.Rect(p.pos[0] - 4, p.pos[1] - 4, GRID + 8, GRID + 8))
+        bounds = particles.bounds()
+        if bounds:
+            rects.append(bounds)
+        return rects
+
+    def render(self, game, particles):
+        layer = level_layer(game)
+        cells = set(game.body)
+        head = game.body[-1]
+        hud = (game.score, game.level, game.lives, max(game.high, game.score))
+        power = bool(game.active_power)
+        animated = self.animated_rects(game, particles)
+
+        if layer is not self.layer:
+            # first frame, new level or invalidated: full repaint
+            self.layer = layer
+            draw_scene(game, particles)
+            pygame.display.flip()
+        else:
+            dirty = self.prev_rects + animated
+            for c in cells.symmetric_difference(self.prev_cells) | {head, self.prev_head}:
+                x, y = cell_xy(c)
+                dirty.append((x, y, GRID + 2, GRID + 2))  # + shadow offset
+            if hud != self.prev_hud:
+                dirty.append(HUD_RECT)
+            if power or self.prev_power:
+                dirty.append(POWER_RECT)
+            dirty = merge_rects(dirty, SCREEN.get_rect())
+
+            segments = game.segments()
+            spread = particles.bounds()
+            seg_rects = [(x, y, GRID + 2, GRID + 2) for x, y in segments]
+            for r in dirty:
+                SCREEN.set_clip(r)
+                SCREEN.blit(layer, r, r)
+                if r.colliderect(HUD_RECT):
+                    draw_scoreboard(*hud)
+                draw_obstacles(game)
+                draw_foods(game)
+                draw_powerups(game)
+                draw_segments(segments, r.collidelistall(seg_rects))
+                if spread and r.colliderect(spread):
+                    particles.draw(SCREEN)
+                if power and r.colliderect(POWER_RECT):
+                    draw_power_indicator(game)
+            SCREEN.set_clip(None)
+            pygame.display.update(dirty)
+
+        self.prev_rects = animated
+        self.prev_cells = cells
+        self.prev_head = head
+        self.prev_hud = hud
+        self.prev_power = power
+
+
+def handle_input(game, event):
+    if event.type == pygame.KEYDOWN:
+        if event.key in KEY_DIRS:
+            game.steer(KEY_DIRS[event.key])
+        elif event.key == pygame.K_p:
+            game.toggle_pause()
+
+
+# =========================
+# PROFILER
+# =========================
+# With --profile, each phase of a frame (event polling, each simulation
+# step and the parts of it in SIM_PHASES, each draw call, present) is timed
+# into a rolling buffer of PROFILE_FRAMES frames. F3 toggles an overlay of
+# per-phase p50/p95/p99, F4 writes the same table to a CSV file. Without
+# --profile, profile() hands back a shared no-op context.
+PROFILER = None
+PROFILE_FRAMES = 600
+PROFILE_REFRESH = 500  # ms between overlay redraws
+PROFILE_FONT = 16
+SIM_PHASES = ("step", "move_snake", "eat_food", "check_collisions", "update")
+_NO_PROFILE = contextlib.nullcontext()
+
+
+def profile(phase):
+    """Context manager timing `phase` into the active FrameProfiler, if any."""
+    return PROFILER.phase(phase) if PROFILER else _NO_PROFILE
+
+
+class _Phase:
+    __slots__ = ("prof", "name", "t0")
+
+    def __init__(self, prof, name):
+        self.prof, self.name = prof, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.prof.add(self.name, time.perf_counter() - self.t0)
+
+
+class FrameProfiler:
+    """Per-phase frame timings over a rolling window, with percentiles.
+
+    With --threaded the simulation thread adds its phases while the main
+    thread ends frames, so `current` is only touched under `lock`.
+    """
+
+    def __init__(self, frames=PROFILE_FRAMES):
+        self.frames = frames
+        self.samples = {}  # phase -> deque of ms, one per frame it ran in
+        self.current = {}  # phase -> ms so far this frame
+        self.lock = threading.Lock()
+        self.visible = False
+        self.panel = None
+        self.panel_at = -PROFILE_REFRESH
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def add(self, name, seconds):
+        with self.lock:
+            self.current[name] = self.current.get(name, 0.0) + seconds * 1000
+
+    def instrument(self, game, names):
+        """Time these methods of `game` (Game.step calls them via self)."""
+        for name in names:
+            method = getattr(game, name)
+
+            def timed(*args, _method=method, _name=name):
+                t0 = time.perf_counter()
+                try:
+                    return _method(*args)
+                finally:
+                    self.add(_name, time.perf_counter() - t0)
+            setattr(game, name, timed)
+
+    def end_frame(self):
+        with self.lock:
+            current, self.current = self.current, {}
+        for name, ms in current.items():
+            buf = self.samples.get(name)
+            if buf is None:
+                buf = self.samples[name] = deque(maxlen=self.frames)
+            buf.append(ms)
+
+    def stats(self):
+        """[(phase, samples, mean, p50, p95, p99, max)] in ms."""
+        rows = []
+        for name, buf in list(self.samples.items()):
+            a = np.fromiter(buf, float, len(buf))
+            p50, p95, p99 = np.percentile(a, (50, 95, 99))
+            rows.append((name, len(a), a.mean(), p50, p95, p99, a.max()))
+        return rows
+
+    def export_csv(self, path):
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(("phase", "samples", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"))
+            for name, n, *ms in self.stats():
+                w.writerow((name, n, *(f"{v:.3f}" for v in ms)))
+
+    def _build_panel(self):
+        font = get_font(PROFILE_FONT)
+        rows = [("phase", "p50", "p95", "p99")]
+        rows += [(name, f"{p50:.2f}", f"{p95:.2f}", f"{p99:.2f}")
+                 for name, _, _, p50, p95, p99, _ in self.stats()]
+        line = font.get_linesize()
+        cols = (0, 140, 195, 250)
+        panel = pygame.Surface((310, line * len(rows) + 12), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, row in enumerate(rows):
+            color = GOLD if i == 0 else WHITE
+            for x, cell in zip(cols, row):
+                panel.blit(font.render(cell, True, color), (8 + x, 6 + i * line))
+        return panel
+
+    def draw(self, target=None):
+        """Blit the overlay (if visible); returns the rect it covers."""
+        if not self.visible:
+            return None
+        now = ticks()
+        if self.panel is None or now - self.panel_at >= PROFILE_REFRESH:
+            self.panel, self.panel_at = self._build_panel(), now
+        (target or SCREEN).blit(self.panel, (10, 44))
+        return self.panel.get_rect(topleft=(10, 44))
+
+
+# =========================
+# SCREENS
+# =========================
+
+def draw_center_text(lines, surface=None):
+    surface = surface or SCREEN
+    y = HEIGHT // 2 - (len(lines) * 28) // 2
+    for text, font, color in lines:
+        surf = text_surface(font, text, color)
+        surface.blit(surf, (WIDTH // 2 - surf.get_width() // 2, y))
+        y += surf.get_height() + 8
+
+
+def dim_layer():
+    """Translucent black sheet laid over a frozen frame."""
+    def build():
+        surf = pygame.Surface(SCREEN.get_size(), pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 120))
+        return surf
+    return cached_layer("dim", SCREEN.get_size(), build)
+
+
+def pause_screen(game, particles, steering=True):
+    """Freeze the current frame under a dim overlay and sleep until unpaused.
+
+    The frame is composited once; after that the loop blocks in
+    pygame.event.wait() and only repaints if the window is exposed. With
+    `steering` off (replays) only P is honoured. Returns False if the window
+    was closed.
+    """
+    draw_scene(game, particles)
+    SCREEN.blit(dim_layer(), (0, 0))
+    txt = text_surface(FONT_BIG, "Paused (press P)", WHITE)
+    SCREEN.blit(txt, (WIDTH//2 - txt.get_width()//2, HEIGHT//2 - 20))
+    frame = SCREEN.copy()
+    present()
+    while game.paused:
+        e = pygame.event.wait()
+        if e.type == pygame.QUIT:
+            return False
+        if e.type == pygame.WINDOWEXPOSED:
+            SCREEN.blit(frame, (0, 0))
+            present()
+        elif e.type == pygame.KEYDOWN and (steering or e.key == pygame.K_p):
+            handle_input(game, e)
+    return True
+
+
+def menu_layer(lines):
+    """Gradient with centred text lines, rendered once per distinct menu."""
+    def build():
+        surf = gradient_layer().copy()
+        draw_center_text(lines, surf)
+        return surf
+    return cached_layer("menu", (SCREEN.get_size(), tuple(lines)), build)
+
+
+def show_menu(lines):
+    """Show a static menu and block until a key or click; returns the event.
+
+    Nothing animates, so the menu is drawn once and the loop sleeps in
+    pygame.event.wait(), repainting only when the window is exposed.
+    """
+    SCREEN.blit(menu_layer(lines), (0, 0))
+    present()
+    startup_mark("menu frame")
+    while True:
+        e = pygame.event.wait()
+        if e.type == pygame.QUIT:
+            pygame.quit(); raise SystemExit
+        if e.type == pygame.WINDOWEXPOSED:
+            SCREEN.blit(menu_layer(lines), (0, 0))
+            present()
+        elif e.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+            return e
+
+
+def start_screen():
+    title = [("S N A K E  –  D E L U X E", FONT_HUGE, WHITE),
+             ("Arrows/WASD to move •  P to Pause", FONT_BIG, (210, 210, 220)),
+             ("Avoid obstacles • Eat gold for +5 ", FONT, (200,200,210)),
+             ("Press any key to start", FONT_BIG, GREEN)]
+    show_menu(title)
+
+
+def game_over_screen(game):
+    lines = [
+        ("Game Over", FONT_HUGE, RED),
+        (f"Score: {game.score}   High: {game.high}", FONT_BIG, WHITE),
+        ("Press R to Restart  •  Q to Quit", FONT_BIG, (210,210,220)),
+    ]
+    while True:
+        e = show_menu(lines)
+        if e.type == pygame.KEYDOWN:
+            if e.key == pygame.K_r:
+                return True
+            if e.key in (pygame.K_q, pygame.K_ESCAPE):
+                return False
+
+def record_path(path, n):
+    """File for the n-th recorded game: path, then path-2, path-3, ..."""
+    if n == 1:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}-{n}{ext}"
+
+
+def new_game(record=None, replay=None):
+    # recorded and replayed games run on step time so the log reproduces them
+    if replay is not None:
+        game = replay.new_game()
+    elif record:
+        game = Game(StepClock())
+    else:
+        game = Game(RealClock())
+    if PROFILER:
+        PROFILER.instrument(game, SIM_PHASES)
+    return game
+
+
+# =========================
+# SIMULATION LOOP
+# =========================
+# The fixed-step loop lives in Simulation so it can run inline between
+# frames or on its own thread. In threaded mode the simulation steps on
+# real time and publishes an immutable Game.snapshot() after each step to
+# a FrameBuffer; the main thread keeps the window (SDL wants events and the
+# display on the thread that opened them), restores the newest snapshot
+# into a private view Game and draws that, so a slow frame never delays a
+# step. Anything that touches the live game from the main thread (input,
+# pause) holds Simulation.lock.
+
+class FrameBuffer:
+    """Latest-wins double buffer of frames between simulation and renderer.
+
+    The simulation publishes into the back slot; the renderer takes it at
+    the start of a frame. Events from steps the renderer never saw are
+    carried over so every pickup still gets its particles.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.back = None
+        self.events = []
+        self.stamp = time.perf_counter()  # when the newest step was due
+        self.rate = 0.0  # steps per second as of that step
+
+    def publish(self, snap, events, stamp, rate):
+        with self.lock:
+            self.back = snap
+            self.events.extend(events)
+            self.stamp = stamp
+            self.rate = rate
+
+    def take(self):
+        """(snapshot, events) published since the last take; snapshot may be None."""
+        with self.lock:
+            snap, self.back = self.back, None
+            events, self.events = self.events, []
+        return snap, events
+
+
+class Simulation:
+    """Feeds replay codes or records input, and steps the game at its speed."""
+
+    def __init__(self, game, recorder=None, codes=None, speed=1.0):
+        self.game = game
+        self.recorder = recorder
+        self.codes = codes
+        self.speed = speed
+        self.step_timer = 0.0
+        self.steps = 0
+        self.ended = False  # game over, or the replay log ran out
+        self.lock = threading.Lock()
+        self.frames = FrameBuffer()
+        self.thread = None
+        self.last = None  # perf_counter of the thread's last advance
+        self._stop = threading.Event()
+
+    def step(self, dt):
+        game = self.game
+        code = next(self.codes, None) if self.codes is not None else None
+        if self.codes is not None and code is None:
+            self.ended = True  # replay log exhausted
+            return
+        if code is not None:
+            game.next_dir = DIRECTIONS[code]
+        if self.recorder:
+            self.recorder.record(game.next_dir)
+        # advance snake one cell, resolve pickups, collisions and timers
+        self.ended = game.step(dt) == STEP_GAME_OVER
+        self.steps += 1
+
+    def advance(self, dt, on_step=None):
+        """Run every fixed step that fits in `dt` seconds (times speed)."""
+        self.step_timer += dt * self.speed
+        target_step = 1.0 / self.game.current_fps()
+        while not self.ended and self.step_timer >= target_step:
+            self.step_timer -= target_step
+            self.step(target_step)
+            if on_step:
+                on_step(target_step)
+            target_step = 1.0 / self.game.current_fps()
+
+    # --- threaded mode ---
+
+    def start(self):
+        self.last = time.perf_counter()
+        self.frames.publish(self.game.snapshot(), [], self.last, self.game.current_fps())
+        self.thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread:
+            self._stop.set()
+            self.thread.join()
+            self.thread = None
+
+    def resync(self):
+        """Forget time that passed while the main thread held the lock (pause)."""
+        self.last = time.perf_counter()
+        self.frames.stamp = self.last - self.step_timer / self.speed
+
+    def phase(self):
+        """How far (0..1) the game is into its next step."""
+        if self.thread:
+            # the live game belongs to the thread; use what it published
+            with self.frames.lock:
+                stamp, rate = self.frames.stamp, self.frames.rate
+            elapsed = (time.perf_counter() - stamp) * self.speed
+        else:
+            elapsed, rate = self.step_timer, self.game.current_fps()
+        return min(elapsed * rate, 1.0)
+
+    def _run(self):
+        events = []
+        while not self._stop.is_set() and not self.ended:
+            with self.lock:
+                now = time.perf_counter()
+                dt, self.last = now - self.last, now
+                steps = self.steps
+                if not self.game.paused:
+                    self.advance(dt, lambda _: events.extend(self.game.events))
+                rate = self.game.current_fps()
+                if self.steps != steps or self.ended:
+                    self.frames.publish(self.game.snapshot(), events,
+                                        now - self.step_timer / self.speed, rate)
+                    events = []
+                wait = (1.0 / rate - self.step_timer) / self.speed
+            time.sleep(min(max(wait, 0.001), 0.05))
+
+
+def main(record=None, replay=None, speed=1.0, dirty=False, threaded=False, smooth=False, fps=None,
+         backend="software", scaled=False, fullscreen=False, timings=False, profiling=False,
+         profile_csv="profile.csv"):
+    """Play interactively, optionally recording to `record`, or watch `replay`.
+
+    `speed` scales simulation time, e.g. 4.0 plays a replay four times faster.
+    `dirty` switches to the DirtyRenderer, which only repaints what changed.
+    `threaded` runs the simulation on its own thread (see Simulation).
+    `smooth` interpolates motion between steps and renders vsync-locked, or
+    uncapped where vsync isn't available. `fps` caps the render loop (0 for
+    no cap); the default is FRAME_RATE, or no cap with `smooth`.
+    `backend` is "software" or "sdl2"; `scaled` and `fullscreen` show the
+    frame scaled to a resizable window or the whole screen (see open_window()).
+    `timings` prints the startup breakdown once the first game frame is up.
+    `profiling` times each frame phase (see FrameProfiler); F3 shows the
+    overlay and F4 writes it to `profile_csv`.
+    """
+    global PROFILER
+    if profiling:
+        PROFILER = FrameProfiler()
+    if fps is None:
+        fps = 0 if smooth else FRAME_RATE
+    if open_window(backend, smooth, scaled, fullscreen) == "sdl2" or smooth or UPSCALER:
+        dirty = False  # textures, interpolated and hand-scaled frames repaint in full
+    startup_mark("window")
+    renderer = DirtyRenderer() if dirty else None
+    game = new_game(record, replay)
+    sim = Simulation(game, Recorder(game) if record else None,
+                     replay.codes() if replay is not None else None, speed)
+    view = Game.from_snapshot(game.snapshot()) if threaded else game
+    motion = Motion(view) if smooth else None
+    games_recorded = 0
+    particles = ParticleSystem()
+    budget = ParticleBudget(1000 / (fps or FRAME_RATE))
+    start_screen()
+    startup_mark("menu wait")
+    CLOCK.tick()  # time spent in the menu is not frame time
+    budget.reset()
+    if threaded:
+        sim.start()
+
+    def on_step(dt):
+        play_events(sim.game, particles)
+        particles.update(dt)
+        if motion:
+            motion.push(sim.game)
+
+    running = True
+    reported = not timings
+
+    while running:
+        dt = CLOCK.tick(fps) / 1000.0
+        frame_start = time.perf_counter()
+        particles.lod = budget.observe(CLOCK.get_rawtime())
+        if PROFILER:
+            PROFILER.end_frame()
+
+        with profile("events"):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                if renderer and event.type == pygame.WINDOWEXPOSED:
+                    renderer.invalidate()
+                if PROFILER and event.type == pygame.KEYDOWN and event.key in (pygame.K_F3, pygame.K_F4):
+                    if event.key == pygame.K_F4:
+                        PROFILER.export_csv(profile_csv)
+                    else:
+                        PROFILER.visible = not PROFILER.visible
+                        if renderer:
+                            renderer.invalidate()
+                    continue
+                if replay is not None and not (event.type == pygame.KEYDOWN and event.key == pygame.K_p):
+                    continue  # only pause works while watching a replay
+                with sim.lock:
+                    handle_input(sim.game, event)
+
+        if sim.game.paused:
+            with sim.lock:
+                resumed = pause_screen(sim.game, particles, steering=replay is None)
+                sim.resync()
+            if not resumed:
+                break
+            if renderer:
+                renderer.invalidate()
+            CLOCK.tick()  # time spent paused is not frame time
+            budget.reset()
+            continue
+
+        if threaded:
+            snap, events = sim.frames.take()
+            if snap is not None:
+                # restore() would rewind the view's cosmetic RNG to the live
+                # game's, which never advances, so every burst would repeat
+                fx_state = view.fx_rng.getstate()
+                view.restore(snap)
+                view.fx_rng.setstate(fx_state)
+                view.events = events
+                play_events(view, particles)
+                if motion:
+                    motion.push(view)
+            particles.update(dt)
+        else:
+            sim.advance(dt, on_step)
+
+        if sim.ended:
+            sim.stop()
+            if sim.recorder:
+                games_recorded += 1
+                sim.recorder.save(record_path(record, games_recorded))
+                sim.recorder = None
+            if not game_over_screen(sim.game):
+                break
+            if renderer:
+                renderer.invalidate()
+            # restart
+            game = new_game(record, replay)
+            sim = Simulation(game, Recorder(game) if record else None,
+                             replay.codes() if replay is not None else None, speed)
+            if threaded:
+                view = Game.from_snapshot(game.snapshot())
+                sim.start()
+            else:
+                view = game
+            motion = Motion(view) if smooth else None
+            CLOCK.tick()  # nor is time spent on the game over screen
+            budget.reset()
+            continue
+
+        # RENDER
+        pose = motion.pose(sim.phase()) if motion else None
+        if GPU:
+            GPU.render(view, particles, pose)
+        elif renderer:
+            with profile("dirty_render"):
+                renderer.render(view, particles)
+            if PROFILER and PROFILER.visible:
+                pygame.display.update(PROFILER.draw())
+        else:
+            draw_scene(view, particles, pose)
+            if PROFILER:
+                PROFILER.draw()
+            with profile("present"):
+                present()
+        if PROFILER:
+            PROFILER.add("frame", time.perf_counter() - frame_start)
+        if not reported:
+            reported = True
+            startup_mark("game frame")
+            print(startup_report())
+
+    sim.stop()
+    if sim.recorder and sim.recorder.steps:
+        sim.recorder.save(record_path(record, games_recorded + 1))
+    pygame.quit()
+
+
+startup_mark("import")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Snake – Deluxe")
+    ap.add_argument("--record", metavar="FILE", help="save each game's replay to FILE")
+    ap.add_argument("--replay", metavar="FILE", help="watch a recorded game")
+    ap.add_argument("--speed", type=float, default=1.0, help="playback speed multiplier")
+    ap.add_argument("--dirty", action="store_true", help="repaint only changed regions")
+    ap.add_argument("--threaded", action="store_true", help="run the simulation on its own thread")
+    ap.add_argument("--smooth", action="store_true", help="interpolate motion at display refresh rate")
+    ap.add_argument("--fps", type=int, help="render frame cap, 0 for none (default 60, none with --smooth)")
+    ap.add_argument("--renderer", choices=("software", "sdl2"), default="software",
+                    help="sdl2 draws with textures, falling back to software")
+    ap.add_argument("--scaled", action="store_true", help="resizable window, frame scaled to fit")
+    ap.add_argument("--fullscreen", action="store_true", help="fill the screen, frame scaled to fit")
+    ap.add_argument("--timings", action="store_true", help="print a startup time breakdown")
+    ap.add_argument("--font", metavar="FILE", help="use this font file instead of a system font")
+    ap.add_argument("--profile", action="store_true", help="time frame phases (F3 overlay, F4 CSV export)")
+    ap.add_argument("--profile-csv", metavar="FILE", default="profile.csv", help="where F4 writes the profile")
+    args = ap.parse_args()
+    if not (args.speed > 0 and math.isfinite(args.speed)):
+        ap.error("--speed must be a positive number")
+    FONT_FILE = args.font or FONT_FILE
+    main(record=args.record, replay=Replay.load(args.replay) if args.replay else None,
+         speed=args.speed, dirty=args.dirty, threaded=args.threaded, smooth=args.smooth, fps=args.fps,
+         backend=args.renderer, scaled=args.scaled, fullscreen=args.fullscreen, timings=args.timings,
+         profiling=args.profile, profile_csv=args.profile_csv)
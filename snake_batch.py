@@ -0,0 +1,151 @@
+import random
+
+import numpy as np
+
+from snake_core import (
+    WIDTH, HEIGHT, GRID, ROWS, STRIDE,
+    LIVES_START, LEVEL_UP_EVERY,
+    DIRECTIONS, DIR_STEP, SOLID, STATIC,
+    Board, cell_of, rect_cells, make_obstacles,
+)
+
+# =========================
+# BATCHED SIMULATION
+# =========================
+# N independent games held as NumPy arrays and advanced with one call.
+# Same board, movement, food, growth and collision rules as snake_core.Game
+# (move_snake, eat_food, trim_tail, check_collisions); moving obstacles,
+# power-ups and special food are left out since they only matter to the
+# interactive game's timers.
+
+CELLS = STRIDE * (ROWS + 2)
+START = (cell_of(WIDTH // 2, HEIGHT // 2 + GRID), cell_of(WIDTH // 2, HEIGHT // 2))
+STEPS = np.array([DIR_STEP[d] for d in DIRECTIONS], dtype=np.int64)
+SPAWN_TRIES = 16  # vectorised rejection rounds before the exact fallback
+
+
+class BatchGame:
+    """`n` snake games stepped together.
+
+    Per game: `static` (walls, UI rows, obstacles) and `body` (segment
+    count) occupancy rows, a `ring` buffer of body cell ids with `head`
+    index and `length`, the direction code `dir` (index into DIRECTIONS),
+    `food` cell, `score`, `level` and `lives`. Games that run out of lives
+    are flagged in `done` and stop advancing until `reset()`.
+    """
+
+    def __init__(self, n, seed=None, obstacles=True):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        layout_rng = random.Random(seed)
+
+        self.static = np.tile(np.frombuffer(bytes(Board().cells), dtype=np.uint8), (n, 1))
+        if obstacles:
+            for i in range(n):
+                obs, _ = make_obstacles(layout_rng)
+                for o in obs:
+                    self.static[i, rect_cells(o)] |= STATIC
+
+        self.body = np.zeros((n, CELLS), dtype=np.uint8)
+        self.ring = np.zeros((n, CELLS), dtype=np.int64)  # longer than any snake
+        self.head = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.dir = np.zeros(n, dtype=np.int8)
+        self.food = np.full(n, -1, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.lives = np.zeros(n, dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+        self.reset()
+
+    def reset(self, mask=None):
+        """Start fresh games for the selected rows (all by default)."""
+        idx = np.arange(self.n) if mask is None else np.flatnonzero(mask)
+        self.score[idx] = 0
+        self.level[idx] = 1
+        self.lives[idx] = LIVES_START
+        self.done[idx] = False
+        self._place_snake(idx)
+        self._spawn_food(idx)
+
+    def heads(self):
+        """Head cell id of every game."""
+        return self.ring[np.arange(self.n), self.head]
+
+    def _place_snake(self, idx):
+        # clear any previous body and lay a fresh two-cell snake moving up
+        self.body[idx] = 0
+        self.ring[idx, 0] = START[0]
+        self.ring[idx, 1] = START[1]
+        self.body[idx, START[0]] = 1
+        self.body[idx, START[1]] = 1
+        self.head[idx] = 1
+        self.length[idx] = 2
+        self.dir[idx] = 0
+
+    def _spawn_food(self, idx):
+        # Vectorised rejection sampling for the common case, then an exact
+        # scan for the few games whose boards are nearly full.
+        for _ in range(SPAWN_TRIES):
+            if not len(idx):
+                return
+            cand = self.rng.integers(0, CELLS, size=len(idx))
+            ok = (self.static[idx, cand] == 0) & (self.body[idx, cand] == 0)
+            self.food[idx[ok]] = cand[ok]
+            idx = idx[~ok]
+        for i in idx:
+            free = np.flatnonzero((self.static[i] == 0) & (self.body[i] == 0))
+            self.food[i] = self.rng.choice(free) if len(free) else -1
+
+    def step(self, actions=None):
+        """Advance every live game by one step.
+
+        `actions` holds one direction code per game (-1 keeps going);
+        reversals are ignored as in Game.steer. Returns `(ate, hit)`
+        boolean arrays of length n.
+        """
+        live = np.flatnonzero(~self.done)
+        ate = np.zeros(self.n, dtype=bool)
+        hit = np.zeros(self.n, dtype=bool)
+        if not len(live):
+            return ate, hit
+
+        # turn: only onto the other axis
+        if actions is not None:
+            a = np.asarray(actions)[live]
+            turn = (a >= 0) & (a // 2 != self.dir[live] // 2)
+            self.dir[live[turn]] = a[turn]
+
+        # move_snake: push the new head
+        cap = self.ring.shape[1]
+        new = self.ring[live, self.head[live]] + STEPS[self.dir[live]]
+        hi = (self.head[live] + 1) % cap
+        self.ring[live, hi] = new
+        self.head[live] = hi
+        self.length[live] += 1
+        self.body[live, new] += 1
+
+        # eat_food
+        got = new == self.food[live]
+        ate[live] = got
+        self.score[live] += got
+        self.level[live] = 1 + self.score[live] // LEVEL_UP_EVERY
+
+        # trim_tail for games that did not grow
+        trim = live[~got]
+        tail = self.ring[trim, (self.head[trim] - self.length[trim] + 1) % cap]
+        self.body[trim, tail] -= 1
+        self.length[trim] -= 1
+
+        # new food lands before the collision reset, as in Game.eat_food
+        self._spawn_food(live[got])
+
+        # check_collisions: walls/UI/obstacles or a second body segment
+        crash = ((self.static[live, new] & SOLID) != 0) | (self.body[live, new] >= 2)
+        hit[live] = crash
+        crashed = live[crash]
+        if len(crashed):
+            self.lives[crashed] -= 1
+            self._place_snake(crashed)
+            self.done[crashed[self.lives[crashed] <= 0]] = True
+        return ate, hit
@@ -0,0 +1,725 @@
+import random
+import time
+from array import array
+from collections import deque, namedtuple
+
+# =========================
+# CONFIG & CONSTANTS
+# =========================
+# Pure simulation core: no pygame, no display, no fonts. Sake_game.py draws
+# whatever state lives here.
+
+WIDTH, HEIGHT = 600, 400
+GRID = 20  # size of each cell
+FPS_BASE = 12  # base snake speed (frames per second)
+MAX_FPS = 30
+
+LIVES_START = 3
+LEVEL_UP_EVERY = 5  # points required per level
+
+# Power-up settings
+POWERUP_CHANCE = 0.08     # chance per food eaten to spawn a power-up
+POWERUP_DURATION = 4500   # ms duration of power effects
+POWERUP_TTL = 9000        # ms a power-up stays on the field
+
+# Special (bonus) food settings
+SPECIAL_FOOD_EVERY = 10   # seconds between spawn attempts
+SPECIAL_FOOD_TTL = 6000   # ms to live
+SPECIAL_FOOD_VALUE = 5
+
+# Obstacles
+NUM_STATIC_OBSTACLES = 6
+NUM_MOVING_OBSTACLES = 2
+
+# Colors (power-ups and pickups carry a color for the renderer)
+GREEN = (40, 220, 120)
+GOLD = (255, 200, 60)
+PURPLE = (160, 120, 255)
+CYAN = (80, 240, 240)
+
+# Directions
+UP = (0, -GRID)
+DOWN = (0, GRID)
+LEFT = (-GRID, 0)
+RIGHT = (GRID, 0)
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)  # index = 2-bit direction code
+
+# Board geometry in cells. The occupancy grid adds a one-cell wall border so
+# a head that leaves the field still lands on a valid (wall) cell.
+COLS = WIDTH // GRID
+ROWS = HEIGHT // GRID
+STRIDE = COLS + 2
+UI_ROWS = 2  # rows hidden under the scoreboard bar
+
+# Cell-id offset of one step in each direction
+DIR_STEP = {UP: -STRIDE, DOWN: STRIDE, LEFT: -1, RIGHT: 1}
+
+# Occupancy flags, one byte per cell. The top bits count snake segments so
+# a head overlapping the tail for one step is still tracked correctly. A cell
+# is free for spawning exactly when its byte is zero.
+WALL = 1
+UI = 2
+STATIC = 4
+MOVING = 8
+ITEM = 16      # food, special food or power-up
+NO_SPAWN = 32  # playable row under the scoreboard edge where items never spawn
+BODY = 64      # added once per snake segment on the cell
+SOLID = WALL | UI | STATIC | MOVING
+
+# Mixed into a game's seed for its cosmetic (particle) RNG stream
+FX_SEED_SALT = 0x9E3779B9
+
+# Step outcomes
+STEP_OK = 0
+STEP_HIT = 1
+STEP_GAME_OVER = 2
+
+
+# =========================
+# CLOCKS
+# =========================
+# Game timers (power-ups, special food) read milliseconds from the clock the
+# Game owns. Both clocks share the same interface: now(), advance(dt),
+# pause(), resume(), and state()/set_state(ms) for snapshots.
+
+class RealClock:
+    """Wall-clock milliseconds that stand still while paused, for play."""
+
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.paused_at = None
+
+    def now(self):
+        t = self.paused_at if self.paused_at is not None else time.monotonic()
+        return int((t - self.t0) * 1000)
+
+    def advance(self, dt):
+        pass  # real time moves on its own
+
+    def pause(self):
+        if self.paused_at is None:
+            self.paused_at = time.monotonic()
+
+    def resume(self):
+        if self.paused_at is not None:
+            self.t0 += time.monotonic() - self.paused_at
+            self.paused_at = None
+
+    def state(self):
+        return self.now()
+
+    def set_state(self, ms):
+        t = time.monotonic()
+        self.t0 = t - ms / 1000
+        if self.paused_at is not None:
+            self.paused_at = t
+
+
+class StepClock:
+    """Virtual milliseconds that only move when a step advances them.
+
+    Lets a headless run simulate minutes of play in milliseconds with the
+    same timer behaviour as real play.
+    """
+
+    def __init__(self, ms=0.0):
+        self.ms = ms
+
+    def now(self):
+        return int(self.ms)
+
+    def advance(self, dt):
+        self.ms += dt * 1000
+
+    def pause(self):
+        pass
+
+    def resume(self):
+        pass
+
+    def state(self):
+        return self.ms
+
+    def set_state(self, ms):
+        self.ms = ms
+
+
+# =========================
+# UTILITIES
+# =========================
+
+def cell_of(x, y):
+    """Grid cell id for a pixel position (border cells included)."""
+    return (y // GRID + 1) * STRIDE + x // GRID + 1
+
+
+def cell_xy(c):
+    """Pixel position [x, y] of a grid cell id."""
+    return [(c % STRIDE - 1) * GRID, (c // STRIDE - 1) * GRID]
+
+
+def rect_cells(rect):
+    """Cell ids touched by a pixel rect, clipped to the bordered grid."""
+    x, y, w, h = rect
+    c0 = max(-1, x // GRID)
+    c1 = min(COLS, (x + w - 1) // GRID)
+    r0 = max(-1, y // GRID)
+    r1 = min(ROWS, (y + h - 1) // GRID)
+    return [(r + 1) * STRIDE + c + 1 for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+
+
+# =========================
+# OCCUPANCY GRID
+# =========================
+def _empty_board():
+    cells = bytearray(STRIDE * (ROWS + 2))
+    for r in range(ROWS + 2):
+        for c in range(STRIDE):
+            if r in (0, ROWS + 1) or c in (0, STRIDE - 1):
+                cells[r * STRIDE + c] = WALL
+            elif r <= UI_ROWS:
+                cells[r * STRIDE + c] = UI
+            elif r == UI_ROWS + 1:
+                cells[r * STRIDE + c] = NO_SPAWN
+    return bytes(cells)
+
+
+_EMPTY_BOARD = _empty_board()
+_EMPTY_FREE = [c for c, v in enumerate(_EMPTY_BOARD) if v == 0]
+_EMPTY_SLOT = [-1] * len(_EMPTY_BOARD)
+for _i, _c in enumerate(_EMPTY_FREE):
+    _EMPTY_SLOT[_c] = _i
+
+
+class Board:
+    """One byte per cell: walls, UI bar, obstacles, items and snake body.
+
+    Collision and spawn checks are a single index into `cells` instead of
+    scanning the snake or testing rects against every obstacle.
+
+    Free cells are also kept in a swap-remove list (`free`) with each cell's
+    index in `slot`, so picking a random spawn cell is O(1) however full
+    the board is.
+    """
+
+    def __init__(self):
+        self.cells = bytearray(_EMPTY_BOARD)
+        self.free = _EMPTY_FREE[:]
+        self.slot = _EMPTY_SLOT[:]
+
+    def _take(self, c):
+        i = self.slot[c]
+        if i < 0:
+            return
+        last = self.free.pop()
+        if last != c:
+            self.free[i] = last
+            self.slot[last] = i
+        self.slot[c] = -1
+
+    def load_free(self, free):
+        """Adopt `free` as the free list, in order, and rebuild `slot`."""
+        self.free = free
+        self.slot = [-1] * len(self.cells)
+        slot = self.slot
+        for i, c in enumerate(free):
+            slot[c] = i
+
+    def _give(self, c):
+        if self.slot[c] < 0:
+            self.slot[c] = len(self.free)
+            self.free.append(c)
+
+    def set(self, c, bits):
+        v = self.cells[c]
+        self.cells[c] = v | bits
+        if not v:
+            self._take(c)
+
+    def clear(self, c, bits):
+        v = self.cells[c] & ~bits
+        self.cells[c] = v
+        if not v:
+            self._give(c)
+
+    def add_body(self, c):
+        v = self.cells[c]
+        self.cells[c] = v + BODY
+        if not v:
+            self._take(c)
+
+    def remove_body(self, c):
+        v = self.cells[c] - BODY
+        self.cells[c] = v
+        if not v:
+            self._give(c)
+
+    def is_free(self, c):
+        return self.cells[c] == 0
+
+    def random_free(self, rng):
+        """A random free cell id drawn from `rng`, or None when the board is full."""
+        if not self.free:
+            return None
+        return self.free[rng.randrange(len(self.free))]
+
+    def hits(self, c):
+        """True if a head on `c` collides with a wall, obstacle or more body."""
+        v = self.cells[c]
+        return bool(v & SOLID) or v >= 2 * BODY
+
+    def hit_cause(self, c):
+        """Name what a head on `c` ran into: wall, obstacle, moving or self."""
+        v = self.cells[c]
+        if v & (WALL | UI):
+            return "wall"
+        if v & STATIC:
+            return "obstacle"
+        if v & MOVING:
+            return "moving"
+        if v >= 2 * BODY:
+            return "self"
+        return None
+
+
+# =========================
+# POWER-UPS
+# =========================
+POWER_TYPES = [
+    ("speed", CYAN),     # faster for a short time
+    ("slow", PURPLE),    # slower for a short time
+    ("bonus", GOLD),     # +3 instant points
+]
+
+
+class PowerUp:
+    def __init__(self, kind, pos, now):
+        self.kind = kind
+        self.color = dict(POWER_TYPES)[kind]
+        self.pos = pos[:]  # grid position [x, y]
+        self.spawn_time = now
+
+    def alive(self, now):
+        return now - self.spawn_time < POWERUP_TTL
+
+    def rect(self):
+        return (self.pos[0], self.pos[1], GRID, GRID)
+
+
+# =========================
+# OBSTACLES
+# =========================
+class MovingObstacle:
+    def __init__(self, rect, dx):
+        self.x, self.y, self.w, self.h = rect
+        self.dx = dx
+        self.marked = []  # cells flagged MOVING on the board
+
+    @property
+    def rect(self):
+        return (self.x, self.y, self.w, self.h)
+
+    def update(self):
+        self.x += self.dx
+        if self.x + self.w >= WIDTH or self.x <= 0:
+            self.dx *= -1
+
+    def span(self):
+        """First and last grid column under the obstacle."""
+        return self.x // GRID, (self.x + self.w - 1) // GRID
+
+    def cells(self):
+        """Grid cells currently under the obstacle."""
+        return rect_cells(self.rect)
+
+
+def make_obstacles(rng=random):
+    obs = []
+    taken = set()
+
+    # Static obstacles
+    for _ in range(NUM_STATIC_OBSTACLES):
+        while True:
+            x = rng.randrange(1, WIDTH // GRID - 1) * GRID
+            y = rng.randrange(2, HEIGHT // GRID - 1) * GRID
+            if (x, y) not in taken and (WIDTH//2 - 3*GRID <= x <= WIDTH//2 + 3*GRID) is False:
+                taken.add((x, y))
+                w = rng.choice([GRID*2, GRID*3])
+                h = rng.choice([GRID, GRID*2])
+                obs.append((x, y, w, h))
+                break
+
+    # Moving obstacles
+    mobs = []
+    for _ in range(NUM_MOVING_OBSTACLES):
+        y = rng.randrange(3, HEIGHT // GRID - 1) * GRID
+        w = GRID * rng.choice([2, 3])
+        rect = (GRID, y, w, GRID)
+        dx = rng.choice([2, 3])
+        mobs.append(MovingObstacle(rect, dx))
+
+    return obs, mobs
+
+
+# =========================
+# SNAPSHOTS
+# =========================
+# Immutable copy of everything a Game needs to carry on exactly where it was.
+# The board, body and free list are packed into bytes, so taking or
+# restoring one is a handful of C-level copies and a pickled snapshot stays
+# small. `free` keeps its order (spawns index into it); `slot` is rebuilt.
+Snapshot = namedtuple("Snapshot", [
+    "seed", "rng", "fx_rng", "clock",
+    "score", "high", "level", "lives", "alive", "paused", "last_hit",
+    "dir", "next_dir", "body",
+    "cells", "free",
+    "food", "special_food", "special_spawned_at", "last_special_check",
+    "powerups", "active_power",
+    "static_obstacles", "moving_obstacles",
+    "start_time", "tick_accum",
+])
+
+
+def _unpack(typecode, data):
+    a = array(typecode)
+    a.frombytes(data)
+    return a
+
+
+# =========================
+# GAME STATE
+# =========================
+class Game:
+    """Snake simulation. Renderers read its state; `step()` advances it.
+
+    Pickups and hits are reported through `self.events` as
+    `(kind, pos, color)` tuples so a front end can play sounds and spawn
+    particles. The list is cleared at the start of every step.
+
+    Timers read `self.clock`: a StepClock by default, so headless runs go as
+    fast as the CPU allows; pass a RealClock for interactive play.
+
+    All gameplay randomness comes from `self.rng`, seeded from `seed`, so a
+    seed plus the same inputs replays the same game. Cosmetic effects draw
+    from the separate `self.fx_rng` and never disturb it.
+    """
+
+    def __init__(self, clock=None, seed=None):
+        self.clock = clock if clock is not None else StepClock()
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.rng = random.Random(self.seed)
+        self.fx_rng = random.Random(self.seed ^ FX_SEED_SALT)
+        self.events = []
+        self.reset_all()
+
+    def reset_all(self):
+        self.score = 0
+        self.high = 0
+        self.level = 1
+        self.lives = LIVES_START
+        self.board = Board()
+        self.static_obstacles, self.moving_obstacles = make_obstacles(self.rng)
+        for o in self.static_obstacles:
+            for c in rect_cells(o):
+                self.board.set(c, STATIC)
+        self.mark_moving()
+        self.body = deque()  # packed cell ids, tail first, head last
+        self.place_snake()
+        self.dir = UP  # moving up
+        self.next_dir = self.dir
+        self.food = self.spawn_food()
+        self.special_food = None
+        self.special_spawned_at = 0
+        self.powerups = []
+        self.active_power = None  # (kind, end_time)
+        self.start_time = self.clock.now()
+        self.last_special_check = self.start_time
+        self.tick_accum = 0
+        self.last_hit = None  # what the last lost life ran into
+        self.alive = True
+        self.paused = False
+
+    def reset_after_hit(self):
+        # Reduce life and reset snake position (keep score/level)
+        self.lives -= 1
+        self.last_hit = self.board.hit_cause(self.body[-1])
+        self.events.append(("hit", cell_xy(self.body[-1]), None))
+        self.place_snake()
+        self.dir = UP
+        self.next_dir = self.dir
+        self.active_power = None
+
+    def place_snake(self):
+        # clear any previous body and lay a fresh two-cell snake
+        for c in self.body:
+            self.board.remove_body(c)
+        self.body.clear()
+        self.body.append(cell_of(WIDTH // 2, HEIGHT // 2 + GRID))
+        self.body.append(cell_of(WIDTH // 2, HEIGHT // 2))
+        for c in self.body:
+            self.board.add_body(c)
+
+    def mark_moving(self):
+        # Obstacles can share cells, so every old mark is cleared before
+        # any new one is set.
+        for m in self.moving_obstacles:
+            for c in m.marked:
+                self.board.clear(c, MOVING)
+        for m in self.moving_obstacles:
+            m.marked = m.cells()
+            for c in m.marked:
+                self.board.set(c, MOVING)
+
+    def update_moving(self):
+        # obstacles move a few pixels per step, so their cells only change
+        # every several steps
+        moved = False
+        for m in self.moving_obstacles:
+            before = m.span()
+            m.update()
+            moved |= m.span() != before
+        if moved:
+            self.mark_moving()
+
+    def spawn_food(self):
+        """Pick a free cell for an item and mark it on the board.
+
+        Returns None when no free cell is left.
+        """
+        # the free-cell index already excludes obstacles, items, the snake
+        # body and the rows under the UI bar
+        c = self.board.random_free(self.rng)
+        if c is None:
+            return None
+        self.board.set(c, ITEM)
+        return cell_xy(c)
+
+    def remove_item(self, pos):
+        self.board.clear(cell_of(*pos), ITEM)
+
+    def spawn_special_food(self):
+        self.special_food = self.spawn_food()
+        self.special_spawned_at = self.clock.now()
+
+    def maybe_spawn_powerup(self):
+        if self.rng.random() < POWERUP_CHANCE:
+            kind, _ = self.rng.choice(POWER_TYPES)
+            pos = self.spawn_food()
+            if pos is not None:
+                self.powerups.append(PowerUp(kind, pos, self.clock.now()))
+
+    def apply_power(self, kind):
+        end = self.clock.now() + POWERUP_DURATION
+        if kind == "bonus":
+            self.score += 3
+        self.active_power = (kind, end)
+
+    def power_multiplier(self):
+        if self.active_power is None:
+            return 1.0
+        kind, end = self.active_power
+        if self.clock.now() > end:
+            self.active_power = None
+            return 1.0
+        return 1.4 if kind == "speed" else (0.6 if kind == "slow" else 1.0)
+
+    def power_remaining(self):
+        """Seconds left on the active power, for the HUD countdown."""
+        if self.active_power is None:
+            return 0.0
+        return max(0, self.active_power[1] - self.clock.now()) / 1000.0
+
+    def current_fps(self):
+        # level-based speed + power modifier, clamped
+        base = FPS_BASE + (self.level - 1) * 1.5
+        return max(6, min(MAX_FPS, int(base * self.power_multiplier())))
+
+    def update_level(self):
+        self.level = 1 + self.score // LEVEL_UP_EVERY
+
+    def steer(self, d):
+        """Queue a turn to direction `d` (UP/DOWN/LEFT/RIGHT); reversals are ignored."""
+        if (d[0] == 0 and self.dir[1] == 0) or (d[1] == 0 and self.dir[0] == 0):
+            self.next_dir = d
+
+    def toggle_pause(self):
+        # timers freeze with the game
+        self.paused = not self.paused
+        if self.paused:
+            self.clock.pause()
+        else:
+            self.clock.resume()
+
+    def move_snake(self):
+        # update direction once per step
+        self.dir = self.next_dir
+        head = self.body[-1] + DIR_STEP[self.dir]
+        self.body.append(head)
+        self.board.add_body(head)
+
+    def trim_tail(self, grew=False):
+        if not grew:
+            self.board.remove_body(self.body.popleft())
+
+    def check_collisions(self):
+        # walls, UI bar, obstacles and body in one lookup
+        return self.board.hits(self.body[-1])
+
+    def segments(self):
+        """Pixel positions of the body, tail first and head last."""
+        return [cell_xy(c) for c in self.body]
+
+    def eat_food(self):
+        if self.food is None:
+            return False
+        ate = self.body[-1] == cell_of(*self.food)
+        if ate:
+            self.score += 1
+            self.update_level()
+            self.events.append(("eat", self.food, GREEN))
+            self.remove_item(self.food)
+            self.food = self.spawn_food()
+            self.maybe_spawn_powerup()
+        return ate
+
+    def eat_special_food(self):
+        if not self.special_food:
+            return False
+        if self.body[-1] == cell_of(*self.special_food):
+            self.score += SPECIAL_FOOD_VALUE
+            self.update_level()
+            self.events.append(("special", self.special_food, GOLD))
+            self.remove_item(self.special_food)
+            self.special_food = None
+            return True
+        return False
+
+    def pickup_powerup(self):
+        head = self.body[-1]
+        if not self.board.cells[head] & ITEM:
+            return False
+        for i, p in enumerate(self.powerups):
+            if cell_of(*p.pos) == head:
+                self.apply_power(p.kind)
+                self.events.append(("power", p.pos, p.color))
+                self.remove_item(p.pos)
+                self.powerups.pop(i)
+                return True
+        return False
+
+    def update(self, dt):
+        # moving obstacles
+        self.update_moving()
+
+        # a full board leaves no food; retry once cells free up
+        if self.food is None:
+            self.food = self.spawn_food()
+
+        # special food spawn/expire
+        now = self.clock.now()
+        if not self.special_food and now - self.last_special_check > SPECIAL_FOOD_EVERY * 1000:
+            # 50% chance to spawn
+            self.last_special_check = now
+            if self.rng.random() < 0.5:
+                self.spawn_special_food()
+        if self.special_food and now - self.special_spawned_at > SPECIAL_FOOD_TTL:
+            self.remove_item(self.special_food)
+            self.special_food = None
+
+        # clean expired powerups
+        for p in self.powerups:
+            if not p.alive(now):
+                self.remove_item(p.pos)
+        self.powerups = [p for p in self.powerups if p.alive(now)]
+
+    def step(self, dt):
+        """Advance one fixed simulation step of `dt` seconds.
+
+        Returns STEP_OK, STEP_HIT (a life was lost) or STEP_GAME_OVER.
+        """
+        self.events.clear()
+        self.clock.advance(dt)
+
+        # advance snake one cell
+        self.move_snake()
+
+        grew = False
+        if self.eat_food():
+            grew = True
+        if self.eat_special_food():
+            grew = True
+
+        # powerup pickup
+        self.pickup_powerup()
+
+        # trim tail if not grown this step
+        self.trim_tail(grew)
+
+        # collisions
+        result = STEP_OK
+        if self.check_collisions():
+            self.reset_after_hit()
+            if self.lives <= 0:
+                self.high = max(self.high, self.score)
+                self.alive = False
+                return STEP_GAME_OVER
+            result = STEP_HIT
+
+        # update world state (obstacles, timers)
+        self.update(dt)
+        return result
+
+    def snapshot(self):
+        """Capture the full game state as an immutable Snapshot."""
+        return Snapshot(
+            self.seed, self.rng.getstate(), self.fx_rng.getstate(), self.clock.state(),
+            self.score, self.high, self.level, self.lives, self.alive, self.paused, self.last_hit,
+            self.dir, self.next_dir, array("H", self.body).tobytes(),
+            bytes(self.board.cells), array("H", self.board.free).tobytes(),
+            tuple(self.food) if self.food else None,
+            tuple(self.special_food) if self.special_food else None,
+            self.special_spawned_at, self.last_special_check,
+            tuple((p.kind, p.pos[0], p.pos[1], p.spawn_time) for p in self.powerups),
+            self.active_power,
+            tuple(self.static_obstacles),
+            tuple((m.x, m.y, m.w, m.h, m.dx, tuple(m.marked)) for m in self.moving_obstacles),
+            self.start_time, self.tick_accum,
+        )
+
+    def restore(self, snap):
+        """Put the game back into the state captured by `snap`."""
+        self.seed = snap.seed
+        self.rng.setstate(snap.rng)
+        self.fx_rng.setstate(snap.fx_rng)
+        self.clock.set_state(snap.clock)
+        self.events.clear()
+        self.score, self.high, self.level, self.lives = snap.score, snap.high, snap.level, snap.lives
+        self.alive, self.paused, self.last_hit = snap.alive, snap.paused, snap.last_hit
+        self.dir, self.next_dir = snap.dir, snap.next_dir
+        self.body = deque(_unpack("H", snap.body))
+        self.board.cells = bytearray(snap.cells)
+        self.board.load_free(_unpack("H", snap.free).tolist())
+        self.food = list(snap.food) if snap.food else None
+        self.special_food = list(snap.special_food) if snap.special_food else None
+        self.special_spawned_at, self.last_special_check = snap.special_spawned_at, snap.last_special_check
+        self.powerups = [PowerUp(kind, [x, y], t) for kind, x, y, t in snap.powerups]
+        self.active_power = snap.active_power
+        self.static_obstacles = list(snap.static_obstacles)
+        self.moving_obstacles = []
+        for x, y, w, h, dx, marked in snap.moving_obstacles:
+            m = MovingObstacle((x, y, w, h), dx)
+            m.marked = list(marked)
+            self.moving_obstacles.append(m)
+        self.start_time, self.tick_accum = snap.start_time, snap.tick_accum
+
+    @classmethod
+    def from_snapshot(cls, snap, clock=None):
+        """A new Game in the state captured by `snap` (StepClock by default)."""
+        game = cls.__new__(cls)
+        game.clock = clock if clock is not None else StepClock()
+        game.rng = random.Random()
+        game.fx_rng = random.Random()
+        game.events = []
+        game.board = Board()
+        game.restore(snap)
+        return game
@@ -0,0 +1,177 @@
+import argparse
+import struct
+import time
+
+from snake_core import DIRECTIONS, STEP_GAME_OVER, Game
+
+# =========================
+# REPLAYS
+# =========================
+# A replay is the game's seed plus the direction in effect on every step.
+# Directions are 2-bit codes (index into DIRECTIONS), run-length encoded
+# as varints of (run_length << 2 | code), so long straight runs cost a byte
+# or two. Games must run on a StepClock for the log to reproduce them.
+
+MAGIC = b"SNKR"
+VERSION = 1
+HEADER = struct.Struct("<4sBQI")  # magic, version, seed, step count
+KEYFRAME_EVERY = 500  # steps between seek keyframes
+
+DIR_CODE = {d: i for i, d in enumerate(DIRECTIONS)}
+
+
+def advance(game, code):
+    """Run one recorded step: set the direction and step at the game's speed."""
+    game.next_dir = DIRECTIONS[code]
+    return game.step(1.0 / game.current_fps())
+
+
+def _put_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(data, i):
+    n = shift = 0
+    while True:
+        b = data[i]
+        i += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, i
+        shift += 7
+
+
+class Recorder:
+    """Collects the per-step direction log of one game."""
+
+    def __init__(self, game):
+        self.seed = game.seed
+        self.runs = []  # [code, count]
+        self.steps = 0
+
+    def record(self, direction):
+        """Log the direction about to be used for the next step."""
+        code = DIR_CODE[direction]
+        if self.runs and self.runs[-1][0] == code:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([code, 1])
+        self.steps += 1
+
+    def to_replay(self):
+        return Replay(self.seed, [tuple(r) for r in self.runs])
+
+    def save(self, path):
+        self.to_replay().save(path)
+
+
+class Replay:
+    """A recorded game that can be re-simulated, stepped or seeked."""
+
+    def __init__(self, seed, runs):
+        self.seed = seed
+        self.runs = runs
+        self.steps = sum(n for _, n in runs)
+        self.keyframes = {}  # step -> Game.snapshot(), filled in as we simulate
+
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, self.steps))
+        for code, n in self.runs:
+            _put_varint(out, (n << 2) | code)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, steps = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a snake replay (or unsupported version)")
+        runs = []
+        i = HEADER.size
+        while i < len(data):
+            v, i = _get_varint(data, i)
+            runs.append((v & 3, v >> 2))
+        replay = cls(seed, runs)
+        if replay.steps != steps:
+            raise ValueError("truncated replay")
+        return replay
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def codes(self, start=0):
+        """Direction codes from step `start` on."""
+        for code, n in self.runs:
+            if start >= n:
+                start -= n
+                continue
+            for _ in range(n - start):
+                yield code
+            start = 0
+
+    def new_game(self):
+        return Game(seed=self.seed)
+
+    def _keep(self, step, game):
+        if step % KEYFRAME_EVERY == 0 and step not in self.keyframes:
+            self.keyframes[step] = game.snapshot()
+
+    def play(self, game=None, start=0, stop=None):
+        """Yield `(step, game, result)` for each step from `start` to `stop`.
+
+        `game` must be the state after `start` steps; without one the
+        replay seeks there first.
+        """
+        if game is None:
+            game = self.seek(start) if start else self.new_game()
+        stop = self.steps if stop is None else min(stop, self.steps)
+        step = start
+        for code in self.codes(start):
+            if step >= stop:
+                return
+            self._keep(step, game)
+            result = advance(game, code)
+            step += 1
+            yield step, game, result
+            if result == STEP_GAME_OVER:
+                return
+
+    def run(self):
+        """Re-simulate the whole replay headlessly; returns the final Game."""
+        game = self.new_game()
+        for _ in self.play(game):
+            pass
+        return game
+
+    def seek(self, step):
+        """The game state after `step` steps, from the nearest keyframe."""
+        base = max((k for k in self.keyframes if k <= step), default=0)
+        game = Game.from_snapshot(self.keyframes[base]) if base in self.keyframes else self.new_game()
+        for _ in self.play(game, base, step):
+            pass
+        return game
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Re-simulate a Snake replay headlessly.")
+    ap.add_argument("path")
+    args = ap.parse_args()
+
+    replay = Replay.load(args.path)
+    t0 = time.perf_counter()
+    game = replay.run()
+    elapsed = time.perf_counter() - t0
+    print(f"seed {replay.seed}: {replay.steps} steps, score {game.score}, level {game.level}, lives {game.lives}")
+    print(f"simulated in {elapsed * 1000:.1f} ms ({replay.steps / elapsed if elapsed else 0:.0f} steps/s)")
+
+
+if __name__ == "__main__":
+    main()
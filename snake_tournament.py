@@ -0,0 +1,202 @@
+import argparse
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import snake_core
+from snake_core import (
+    DIRECTIONS, DIR_STEP, STEP_HIT, STEP_GAME_OVER, STRIDE,
+    Game, cell_of,
+)
+
+# =========================
+# POLICIES
+# =========================
+# A policy looks at a Game and returns a direction to steer to (or None to
+# keep going). Policies are looked up by name so they cross process
+# boundaries cheaply.
+
+def random_policy(game, rng):
+    """Keep going, with an occasional random turn."""
+    if rng.random() < 0.1:
+        return rng.choice(DIRECTIONS)
+    return None
+
+
+def greedy_policy(game, rng):
+    """Head for the food along the shortest axis, avoiding instant death."""
+    head = game.body[-1]
+    target = cell_of(*game.food) if game.food else head
+    tr, tc = divmod(target, STRIDE)
+    best, best_d = None, None
+    for d in DIRECTIONS:
+        if d[0] == -game.dir[0] and d[1] == -game.dir[1]:
+            continue  # reversal
+        c = head + DIR_STEP[d]
+        if game.board.hits(c):
+            continue
+        r, col = divmod(c, STRIDE)
+        dist = abs(r - tr) + abs(col - tc)
+        if best_d is None or dist < best_d:
+            best, best_d = d, dist
+    return best
+
+
+POLICIES = {
+    "random": random_policy,
+    "greedy": greedy_policy,
+}
+
+
+# =========================
+# RUNNER
+# =========================
+
+# snake_core settings that --set may change. Board geometry (GRID, WIDTH,
+# ...) is baked into lookup tables at import, so it can't be overridden.
+TUNABLES = (
+    "FPS_BASE", "MAX_FPS", "LIVES_START", "LEVEL_UP_EVERY",
+    "POWERUP_CHANCE", "POWERUP_DURATION", "POWERUP_TTL",
+    "SPECIAL_FOOD_EVERY", "SPECIAL_FOOD_TTL", "SPECIAL_FOOD_VALUE",
+    "NUM_STATIC_OBSTACLES", "NUM_MOVING_OBSTACLES",
+)
+
+
+def apply_overrides(overrides):
+    """Set snake_core constants (e.g. LEVEL_UP_EVERY) in this process."""
+    for name, value in overrides.items():
+        if name not in TUNABLES:
+            raise ValueError(f"unknown setting: {name}")
+        setattr(snake_core, name, value)
+
+
+def run_game(seed, policy="greedy", max_steps=20000):
+    """Play one headless game to the end and return its result dict."""
+    rng = random.Random(seed ^ 0x5EED)
+    decide = POLICIES[policy]
+    game = Game(seed=seed)
+    deaths = Counter()
+    steps = 0
+    result = None
+    timeout = False
+    while steps < max_steps:
+        d = decide(game, rng)
+        if d is not None:
+            game.steer(d)
+        result = game.step(1.0 / game.current_fps())
+        steps += 1
+        if result in (STEP_HIT, STEP_GAME_OVER):
+            deaths[game.last_hit] += 1
+        if result == STEP_GAME_OVER:
+            break
+    else:
+        timeout = True
+    return {
+        "seed": seed,
+        "policy": policy,
+        "score": game.score,
+        "level": game.level,
+        "steps": steps,
+        "deaths": dict(deaths),
+        "timeout": timeout,
+    }
+
+
+def _run_chunk(args):
+    seeds, policy, max_steps, overrides = args
+    apply_overrides(overrides)
+    return [run_game(s, policy, max_steps) for s in seeds]
+
+
+def run_tournament(games, policy="greedy", seed=0, workers=None, max_steps=20000, overrides=None, chunk=64):
+    """Run `games` headless games across a process pool and return a report."""
+    overrides = overrides or {}
+    seeds = list(range(seed, seed + games))
+    jobs = [(seeds[i:i + chunk], policy, max_steps, overrides) for i in range(0, len(seeds), chunk)]
+    t0 = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_run_chunk, jobs):
+            results.extend(part)
+    return summarize(results, time.perf_counter() - t0, overrides)
+
+
+def summarize(results, elapsed, overrides=None):
+    scores = [r["score"] for r in results]
+    steps = sum(r["steps"] for r in results)
+    deaths = Counter()
+    for r in results:
+        deaths.update(r["deaths"])
+    return {
+        "games": len(results),
+        "overrides": overrides or {},
+        "score_mean": statistics.fmean(scores) if scores else 0.0,
+        "score_median": statistics.median(scores) if scores else 0,
+        "score_max": max(scores, default=0),
+        "levels": dict(sorted(Counter(r["level"] for r in results).items())),
+        "deaths": dict(deaths.most_common()),
+        "timeouts": sum(1 for r in results if r["timeout"]),
+        "steps": steps,
+        "seconds": elapsed,
+        "steps_per_sec": steps / elapsed if elapsed else 0.0,
+    }
+
+
+def print_report(report):
+    print(f"games:        {report['games']}")
+    if report["overrides"]:
+        print("overrides:    " + ", ".join(f"{k}={v}" for k, v in report["overrides"].items()))
+    print(f"score:        mean {report['score_mean']:.2f}  median {report['score_median']}  max {report['score_max']}")
+    print("levels:       " + "  ".join(f"L{k}: {v}" for k, v in report["levels"].items()))
+    print("deaths:       " + "  ".join(f"{k}: {v}" for k, v in report["deaths"].items()))
+    print(f"timeouts:     {report['timeouts']}")
+    print(f"steps:        {report['steps']} in {report['seconds']:.2f}s ({report['steps_per_sec']:.0f}/s)")
+
+
+def _parse_override(text):
+    """NAME=VALUE -> (name, int or float); ValueError if malformed or unknown."""
+    name, sep, value = text.partition("=")
+    name = name.strip()
+    if not sep or not name:
+        raise ValueError(f"expected NAME=VALUE, got {text!r}")
+    if name not in TUNABLES:
+        raise ValueError(f"unknown setting: {name} (choose from {', '.join(TUNABLES)})")
+    try:
+        return name, int(value)
+    except ValueError:
+        pass
+    try:
+        return name, float(value)
+    except ValueError:
+        raise ValueError(f"{name}: not a number: {value!r}") from None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run many headless Snake games in parallel.")
+    ap.add_argument("-n", "--games", type=int, default=1000)
+    ap.add_argument("-p", "--policy", choices=sorted(POLICIES), default="greedy")
+    ap.add_argument("--seed", type=int, default=0, help="first seed; game i uses seed + i")
+    ap.add_argument("-j", "--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--max-steps", type=int, default=20000)
+    ap.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                    help="override a snake_core setting, e.g. --set LEVEL_UP_EVERY=3")
+    ap.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = ap.parse_args()
+
+    try:
+        overrides = dict(_parse_override(s) for s in args.set)
+    except ValueError as e:
+        ap.error(f"--set: {e}")
+    report = run_tournament(args.games, args.policy, args.seed, args.workers, args.max_steps, overrides)
+    if args.json:
+        import json
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
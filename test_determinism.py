@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from snake_core import STEP_GAME_OVER, Game
+from snake_replay import DIR_CODE, Recorder, Replay, advance
+from snake_tournament import greedy_policy
+
+
+def state(game):
+    """Everything that must match for two games to play on identically."""
+    return (
+        game.score, game.level, game.lives, game.alive, game.dir, game.next_dir,
+        list(game.body), bytes(game.board.cells), list(game.board.free),
+        game.food, game.special_food, game.active_power,
+        [(p.kind, p.pos, p.spawn_time) for p in game.powerups],
+        [(m.x, m.y, m.dx) for m in game.moving_obstacles],
+        game.clock.now(), game.rng.getstate(), game.fx_rng.getstate(),
+    )
+
+
+def play(game, seed, steps):
+    """Steer with the greedy tournament policy for up to `steps` steps."""
+    rng = random.Random(seed)
+    for _ in range(steps):
+        d = greedy_policy(game, rng)
+        if d:
+            game.steer(d)
+        if game.step(1.0 / game.current_fps()) == STEP_GAME_OVER:
+            break
+    return game
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_snapshot_resumes_identically(seed):
+    game = play(Game(seed=seed), seed, 200)
+    snap = game.snapshot()
+    copy = Game.from_snapshot(snap)
+    assert state(copy) == state(game)
+
+    play(game, seed + 1000, 400)
+    play(copy, seed + 1000, 400)
+    assert state(copy) == state(game)
+
+
+def test_board_free_list_matches_cells():
+    game = play(Game(seed=3), 3, 300)
+    board = Game.from_snapshot(game.snapshot()).board
+    assert sorted(board.free) == [c for c, v in enumerate(board.cells) if v == 0]
+    for i, c in enumerate(board.free):
+        assert board.slot[c] == i
+
+
+def record(seed, steps):
+    """Play and record a game; returns (game, recorder)."""
+    game = Game(seed=seed)
+    rec = Recorder(game)
+    rng = random.Random(seed)
+    for _ in range(steps):
+        d = greedy_policy(game, rng)
+        if d:
+            game.steer(d)
+        rec.record(game.next_dir)
+        if advance(game, DIR_CODE[game.next_dir]) == STEP_GAME_OVER:
+            break
+    return game, rec
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_replay_round_trip(seed):
+    game, rec = record(seed, 3000)
+    replay = Replay.from_bytes(rec.to_replay().to_bytes())
+    assert replay.steps == rec.steps
+    assert state(replay.run()) == state(game)
+
+
+def test_seek_matches_play():
+    _, rec = record(11, 1200)
+    replay = rec.to_replay()
+    checks = (1, 499, 500, 501, replay.steps)
+    expected = {step: state(g) for step, g, _ in replay.play() if step in checks}
+    assert sorted(expected) == sorted(checks)
+    for step, want in expected.items():
+        assert state(replay.seek(step)) == want